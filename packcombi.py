@@ -1,50 +1,87 @@
-import matplotlib.pyplot as plt
-from matplotlib.patches import Arc
-import numpy as np
-import pandas as pd
+import functools
+import gzip
+import hashlib
+import importlib
+import io
+import json
+import math
+import os
+import shutil
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+
+class _ImportDiffere:
+    """
+    Mandataire d'un module importé seulement au premier accès à l'un de ses
+    attributs ; le module remplace alors le mandataire dans packcombi. Le cœur
+    combinatoire (comptages, générateurs) s'importe ainsi sans NumPy, pandas
+    ni matplotlib, ce qui allège le démarrage des processus de calcul.
+    """
+
+    def __init__(self, nom_module, nom_global):
+        self._nom_module = nom_module
+        self._nom_global = nom_global
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._nom_module)
+            globals()[self._nom_global] = self._module
+        return getattr(self._module, attr)
+
+
+plt = _ImportDiffere("matplotlib.pyplot", "plt")
+np = _ImportDiffere("numpy", "np")
+pd = _ImportDiffere("pandas", "pd")
 
 # ========== Factorielle et coefficient binomial ==========
 
-def facto_rec(x):
+def facto_rec(x, modulo=None):
     """
-    Calcule la factorielle de x de manière récursive.
+    Calcule la factorielle de x de manière récursive (modulo un entier si
+    modulo est donné).
     """
     if x == 0:
-        return 1
-    return x * facto_rec(x-1)
+        return _reduit(1, modulo)
+    return _reduit(x * facto_rec(x-1, modulo), modulo)
 
 
-def coeff_bino(n, k):
+def coeff_bino(n, k, modulo=None):
     """
-    Calcule le coefficient binomial C(n, k).
+    Calcule le coefficient binomial C(n, k) (modulo un entier si modulo est donné,
+    par le théorème de Lucas pour un module premier).
     """
+    if modulo is not None:
+        if k < 0 or k > n:
+            return 0
+        if _est_premier(modulo):
+            return _coeff_bino_lucas(n, k, modulo)
+        return math.comb(n, k) % modulo
     return facto_rec(n) // (facto_rec(k)*facto_rec(n-k))
 
 
-def coeff_bino_rec(n, k):
+def coeff_bino_rec(n, k, modulo=None):
     """
-    Calcule le coefficient binomial C(n, k) de manière récursive.
+    Calcule le coefficient binomial C(n, k) de manière récursive (modulo un
+    entier si modulo est donné).
     """
     if k > n:
         return 0
     if k == 0 or k == n:
-        return 1
+        return _reduit(1, modulo)
     
-    return coeff_bino_rec(n-1, k-1) + coeff_bino_rec(n-1, k)
+    return _reduit(coeff_bino_rec(n-1, k-1, modulo) + coeff_bino_rec(n-1, k, modulo), modulo)
 
 
-def coeff_bino_dyn(n, k, memo={}):
+def coeff_bino_dyn(n, k, memo=None, modulo=None):
     """
-    Calcule le coefficient binomial C(n, k) de manière récursive et dynamique.
+    Calcule le coefficient binomial C(n, k) de manière dynamique, par le
+    triangle de Pascal itératif de ligne_triangle (memo n'est plus utilisé :
+    les lignes sont gardées dans le cache partagé).
     """
-    if k > n:
-        return 0
-    if k == 0 or k == n:
-        return 1
-    
-    if (n, k) not in memo:
-        memo[(n, k)] = coeff_bino_dyn(n-1, k-1) + coeff_bino_dyn(n-1, k)
-    return memo[(n, k)]
+    return coeff_bino_table(n, k, modulo)
 
 
 # ========== Permutations et combinaisons ==========
@@ -64,6 +101,122 @@ def permute_rec(lst):
             result.append([current] + e)
     return result
 
+
+def _permutation_suivante(idx):
+    """
+    Remplace idx (liste) par la permutation suivante dans l'ordre
+    lexicographique ; renvoie False si idx était la dernière.
+    """
+    i = len(idx) - 2
+    while i >= 0 and idx[i] >= idx[i+1]:
+        i -= 1
+    if i < 0:
+        return False
+    j = len(idx) - 1
+    while idx[j] <= idx[i]:
+        j -= 1
+    idx[i], idx[j] = idx[j], idx[i]
+    idx[i+1:] = idx[:i:-1]
+    return True
+
+
+def _blocs_permutations(idx, lst, chunk_size, nb=None):
+    """
+    Produit, à partir de la permutation d'indices idx, des tableaux (chunk, n)
+    de permutations de lst (nb au plus si nb est donné), dans l'ordre de permute_rec.
+    Les blocs sont formés d'un préfixe fixe suivi des r! permutations des r derniers
+    éléments (table précalculée), r étant le plus grand tel que r! <= chunk_size.
+    """
+    n = len(idx)
+    valeurs = np.asarray(lst)
+    if n == 0:
+        yield np.zeros((1, 0), dtype=valeurs.dtype)
+        return
+    r = 1
+    while r < n and math.factorial(r + 1) <= chunk_size:
+        r += 1
+    table = np.array(permute_rec(list(range(r))), dtype=np.int64).reshape(-1, r)
+    par_bloc = max(1, chunk_size // len(table))
+    morceaux, restant = [], nb
+    fini = False
+    while not fini and restant != 0:
+        # Position de idx parmi les permutations de son suffixe (si l'on démarre au milieu d'un bloc).
+        suffixe = idx[n-r:]
+        debut = rang_permutation(suffixe)
+        bloc = np.empty((len(table) - debut, n), dtype=np.int64)
+        bloc[:, :n-r] = idx[:n-r]
+        bloc[:, n-r:] = np.sort(suffixe)[table[debut:]]
+        if restant is not None:
+            bloc = bloc[:restant]
+            restant -= len(bloc)
+        morceaux.append(bloc)
+        # Le suffixe le plus grand (décroissant) précède le préfixe suivant.
+        idx[n-r:] = sorted(suffixe, reverse=True)
+        fini = not _permutation_suivante(idx)
+        if len(morceaux) == par_bloc or fini or restant == 0:
+            yield valeurs[np.concatenate(morceaux)]
+            morceaux = []
+
+
+def permute_lazy(lst, chunk_size=None):
+    """
+    Version paresseuse de permute_rec : produit les permutations de lst une à
+    une (listes), dans le même ordre, en modifiant sur place une permutation
+    d'indices (algorithme de la permutation suivante). Avec chunk_size, produit
+    des tableaux NumPy (chunk, n) d'au plus chunk_size permutations.
+    """
+    return permutations_range(lst, 0, math.factorial(len(lst)), chunk_size)
+
+
+def rang_permutation(perm, lst=None):
+    """
+    Rang de perm dans permute_rec(lst) (par défaut lst = sorted(perm)), calculé
+    par le code de Lehmer : r = sum_i L[i] (n-1-i)!.
+    """
+    if lst is not None:
+        position = {x: i for i, x in enumerate(lst)}
+        perm = [position[x] for x in perm]
+    n = len(perm)
+    r = 0
+    for i, l in enumerate(code_lehmer(perm)):
+        r += l * math.factorial(n - 1 - i)
+    return r
+
+
+def unrang_permutation(r, lst):
+    """
+    Permutation de rang r dans permute_rec(lst) : les chiffres de r en base
+    factorielle forment le code de Lehmer.
+    """
+    n = len(lst)
+    if not 0 <= r < math.factorial(n):
+        raise IndexError(f"Rang {r} hors de [0, {math.factorial(n)}).")
+    restants = list(range(n))
+    idx = []
+    for i in range(n):
+        l, r = divmod(r, math.factorial(n - 1 - i))
+        idx.append(restants.pop(l))
+    return [lst[i] for i in idx]
+
+
+def permutations_range(lst, debut, fin, chunk_size=None):
+    """
+    Générateur des permutations de rangs debut à fin-1 dans permute_rec(lst)
+    (voir rang_permutation), une à une ou par tableaux (chunk, n) d'au plus
+    chunk_size permutations, par exemple pour répartir n! entre plusieurs
+    processus avec decoupe_rangs.
+    """
+    if debut >= fin:
+        return
+    idx = unrang_permutation(debut, list(range(len(lst))))
+    if chunk_size is not None:
+        yield from _blocs_permutations(idx, lst, chunk_size, fin - debut)
+        return
+    for _ in range(fin - debut):
+        yield [lst[i] for i in idx]
+        if not _permutation_suivante(idx):
+            return
+
 def combine_dyn(lst, memo=None):
     """
     Génère toutes les combinaisons possibles de toutes les tailles à partir d'une liste.
@@ -94,12 +247,135 @@ def combine_dyn(lst, memo=None):
     return result
 
 
+# ========== Sous-ensembles en masques de bits ==========
+
+# Un sous-ensemble de lst est codé par un entier : le bit i est à 1 si lst[i]
+# en fait partie. L'ordre de combine_dyn(lst) est celui des masques t = 0, ..., 2^n - 1
+# lus en inversant les bits (lst[i] correspond au bit n-1-i de t).
+
+def masque_vers_sous_ensemble(masque, lst):
+    """
+    Liste des éléments de lst dont le bit est à 1 dans masque.
+    """
+    return [x for i, x in enumerate(lst) if (masque >> i) & 1]
+
+
+def sous_ensemble_vers_masque(sous_ensemble, lst):
+    """
+    Masque du sous-ensemble (d'éléments de lst).
+    """
+    position = {x: i for i, x in enumerate(lst)}
+    return sum(1 << position[x] for x in sous_ensemble)
+
+
+def inverse_bits(masque, n):
+    """
+    Masque obtenu en lisant les n bits de masque dans l'ordre inverse.
+    """
+    return int(format(masque, f"0{n}b")[::-1], 2) if n > 0 else 0
+
+
+def masques_lazy(n):
+    """
+    Tous les masques des sous-ensembles de [n], dans l'ordre de combine_dyn.
+    """
+    for t in range(1 << n):
+        yield inverse_bits(t, n)
+
+
+def combine_lazy(lst):
+    """
+    Version paresseuse de combine_dyn : mêmes sous-ensembles, dans le même ordre.
+    """
+    for masque in masques_lazy(len(lst)):
+        yield masque_vers_sous_ensemble(masque, lst)
+
+
+def masques_taille(n, k):
+    """
+    Masques des sous-ensembles à k éléments de [n] par ordre croissant, c'est-à-dire
+    dans l'ordre colexicographique (astuce de Gosper).
+    """
+    if k == 0:
+        yield 0
+        return
+    if k > n:
+        return
+    masque = (1 << k) - 1
+    while masque < 1 << n:
+        yield masque
+        # Plus petit entier supérieur ayant le même nombre de bits à 1.
+        bas = masque & -masque
+        haut = masque + bas
+        masque = haut | (((masque ^ haut) >> 2) // bas)
+
+
+def masques_gray(n):
+    """
+    Masques des sous-ensembles de [n] dans l'ordre du code de Gray réfléchi, avec
+    l'indice du bit modifié depuis le précédent (None pour le premier).
+    """
+    yield 0, None
+    masque = 0
+    for g in range(1, 1 << n):
+        bit = (g & -g).bit_length() - 1
+        masque ^= 1 << bit
+        yield masque, bit
+
+
+def rang_colex(masque):
+    """
+    Rang d'un masque parmi ceux de même taille dans l'ordre colexicographique :
+    sum_j C(p_j, j+1), où p_0 < p_1 < ... sont les positions des bits à 1.
+    """
+    r, j = 0, 0
+    p = 0
+    while masque:
+        if masque & 1:
+            j += 1
+            r += math.comb(p, j)
+        masque >>= 1
+        p += 1
+    return r
+
+
+def unrang_colex(r, k):
+    """
+    Masque à k bits de rang r dans l'ordre colexicographique.
+    """
+    masque = 0
+    for j in range(k, 0, -1):
+        # Plus grande position p telle que C(p, j) <= r.
+        p = j - 1
+        while math.comb(p + 1, j) <= r:
+            p += 1
+        r -= math.comb(p, j)
+        masque |= 1 << p
+    return masque
+
+
+def matrice_masques(masques, n):
+    """
+    Matrice booléenne (N, n) des masques : M[i, j] vrai si le bit j du i-ème masque est à 1.
+    """
+    masques = np.asarray(masques, dtype=np.int64)
+    return ((masques[:, None] >> np.arange(n)) & 1).astype(bool)
+
+
+def matrice_sous_ensembles(n):
+    """
+    Matrice booléenne (2^n, n) de tous les sous-ensembles de [n], dans l'ordre de combine_dyn.
+    """
+    t = np.arange(1 << n, dtype=np.int64)
+    return ((t[:, None] >> (n - 1 - np.arange(n))) & 1).astype(bool)
+
+
 # ========== Nombre de Stirling de seconde espèce ==========
 
-def calcule_stirling_rec(n, k):
+def calcule_stirling_rec(n, k, modulo=None):
     """
     Calcule le nombre de Stirling de seconde espèce S(n, k)
-    selon une définition récursive.
+    selon une définition récursive (modulo un entier si modulo est donné).
     
     S(n, k) = S(n-1, k-1) + k * S(n-1, k)
     avec les cas de base :
@@ -108,62 +384,381 @@ def calcule_stirling_rec(n, k):
        - S(0, k) = 0 pour k > 0
     """
     if n == 0 and k == 0:
-        return 1
+        return _reduit(1, modulo)
     if (n == 0 and k > 0) or (n > 0 and k == 0):
         return 0
 
-    return calcule_stirling_rec(n-1, k-1) + k*calcule_stirling_rec(n-1, k)
+    return _reduit(calcule_stirling_rec(n-1, k-1, modulo) + k*calcule_stirling_rec(n-1, k, modulo), modulo)
 
 
-def calcule_stirling_dyn(n, k, memo={}):
+def calcule_stirling_dyn(n, k, memo=None, modulo=None):
     """
-    Calcule le nombre de Stirling de seconde espèce (version dynamique).
+    Calcule le nombre de Stirling de seconde espèce (version dynamique), par le
+    triangle itératif de ligne_triangle (memo n'est plus utilisé : les lignes
+    sont gardées dans le cache partagé).
     """
-    if n == 0 and k == 0:
-        return 1
-    if (n == 0 and k > 0) or (n > 0 and k == 0):
-        return 0
-
-    if (n, k) not in memo:
-        memo[(n, k)] = calcule_stirling_dyn(n-1, k-1) + k*calcule_stirling_dyn(n-1, k)
-    return memo[(n, k)]
+    return calcule_stirling_table(n, k, modulo)
 
 
 # ========== Nombre de Bell ==========
 
-def calcule_bell_iter(n):
+def calcule_bell_iter(n, modulo=None):
     res = 0
     for k in range(1, n+1):
-        res += calcule_stirling_rec(n, k)
+        res = _reduit(res + calcule_stirling_rec(n, k, modulo), modulo)
     return res
 
 
-def calcule_bell_rec(n):
+def calcule_bell_rec(n, modulo=None):
     if n == 0:
-        return 1
+        return _reduit(1, modulo)
     
     res = 0
     for m in range(n):
-        res += coeff_bino_rec(n-1, m) * calcule_bell_rec(m)
+        res = _reduit(res + coeff_bino_rec(n-1, m, modulo) * calcule_bell_rec(m, modulo), modulo)
     return res
 
 
-def calcule_bell_dyn(n, memo={}):
-    # Version dynamique.
-    if n == 0:
-        return 1
-    
-    if n in memo:
-        return memo[n]
-    
-    res = 0
-    for m in range(n):
-        res += coeff_bino_dyn(n-1, m) * calcule_bell_dyn(m)
+def calcule_bell_dyn(n, memo=None, modulo=None):
+    # Version dynamique : somme d'une ligne du triangle de Stirling itératif
+    # (memo n'est plus utilisé).
+    return calcule_bell_table(n, modulo)
+
+
+# ========== Tables de nombres (calcul itératif) ==========
+
+# Les triangles de nombres sont calculés ligne par ligne, sans récursion :
+#
+#                   T(n, k) = T(n-1, k-1) + m(k) * T(n-1, k),   T(0, 0) = 1
+#
+# - "binomial" : m(k) = 1, T(n, k) = C(n, k) ;
+# - "stirling" : m(k) = k, T(n, k) = S(n, k) ;
+# - "dowling" : m(k) = 2k + 1, T(n, k) = nombres de Whitney W(n, k) du treillis de Dowling,
+#   dont la somme sur k est le nombre de Dowling (partitions de type B) ;
+# - "dowling_no_zero_block" : m(k) = 2k, T(n, k) = 2^(n-k) S(n, k).
+#
+# Les dernières lignes calculées sont gardées dans un cache borné (LRU), partagé
+# entre threads, et le calcul d'une ligne repart de la plus proche ligne en cache.
+
+TRIANGLES = {
+    "binomial": lambda k: 1,
+    "stirling": lambda k: k,
+    "dowling": lambda k: 2*k + 1,
+    "dowling_no_zero_block": lambda k: 2*k,
+}
+
+_cache_lignes = OrderedDict()
+_verrou_lignes = threading.Lock()
+_taille_cache_lignes = 64
+
+
+def set_taille_cache_lignes(taille):
+    """
+    Fixe le nombre maximal de lignes gardées en cache (0 pour désactiver le cache).
+    """
+    global _taille_cache_lignes
+    with _verrou_lignes:
+        _taille_cache_lignes = taille
+        while len(_cache_lignes) > _taille_cache_lignes:
+            _cache_lignes.popitem(last=False)
+
+
+def vide_cache_lignes():
+    """
+    Vide le cache des lignes de triangles.
+    """
+    with _verrou_lignes:
+        _cache_lignes.clear()
+
+
+def _lignes_suivantes(famille, ligne, m, n, modulo=None):
+    """
+    Calcule la ligne n du triangle à partir de la ligne m. Modulo un entier,
+    les lignes sont des vecteurs NumPy int64 tant que les produits tiennent
+    dans un mot machine.
+    """
+    mult = [TRIANGLES[famille](k) for k in range(n+1)]
+    if modulo is None:
+        for i in range(m+1, n+1):
+            ligne = [mult[0]*ligne[0]] + [a + c*b for a, c, b in zip(ligne, mult[1:i], ligne[1:])] + [ligne[-1]]
+        return ligne
+
+    dtype = np.int64 if (max(mult) + 1) * modulo < 2**63 else object
+    ligne = np.array([int(x) for x in ligne], dtype=dtype) % modulo
+    mult = np.array(mult, dtype=dtype)
+    for i in range(m+1, n+1):
+        nouvelle = np.empty(i+1, dtype=dtype)
+        nouvelle[0] = mult[0] * ligne[0] % modulo
+        nouvelle[1:i] = (ligne[:-1] + mult[1:i] * ligne[1:]) % modulo
+        nouvelle[i] = ligne[-1]
+        ligne = nouvelle
+    return ligne
+
+
+def ligne_triangle(famille, n, modulo=None):
+    """
+    Retourne la ligne n (tuple de T(n, 0), ..., T(n, n)) du triangle famille
+    (clé de TRIANGLES). Si modulo est donné, la ligne est réduite modulo cet
+    entier et renvoyée comme vecteur NumPy en lecture seule.
+    """
+    if famille not in TRIANGLES:
+        raise ValueError(f"Triangle inconnu : {famille}.")
+    cle = (famille, n, modulo)
+    with _verrou_lignes:
+        if cle in _cache_lignes:
+            _cache_lignes.move_to_end(cle)
+            return _cache_lignes[cle]
+        # On repart de la plus grande ligne en cache d'indice inférieur à n.
+        m, ligne = 0, [1]
+        for (f, i, p), l in _cache_lignes.items():
+            if f == famille and p == modulo and m < i < n:
+                m, ligne = i, l
+
+    disque = _lit_ligne_disque(famille, n, modulo)
+    if disque is not None:
+        ligne = disque
+    else:
+        ligne = _lignes_suivantes(famille, list(ligne), m, n, modulo)
+        if modulo is None:
+            ligne = tuple(ligne)
+        else:
+            ligne.flags.writeable = False
+        _ecrit_ligne_disque(famille, n, modulo, ligne)
+
+    with _verrou_lignes:
+        if _taille_cache_lignes > 0:
+            _cache_lignes[cle] = ligne
+            _cache_lignes.move_to_end(cle)
+            while len(_cache_lignes) > _taille_cache_lignes:
+                _cache_lignes.popitem(last=False)
+    return ligne
+
+
+def _coeff_triangle(famille, n, k, modulo=None):
+    if n < 0 or k < 0 or k > n:
+        return 0
+    return int(ligne_triangle(famille, n, modulo)[k])
+
+
+def _somme_ligne(famille, n, modulo=None):
+    if modulo is None:
+        return sum(ligne_triangle(famille, n))
+    return int(ligne_triangle(famille, n, modulo).sum() % modulo)
+
+
+# ========== Arithmétique modulaire ==========
+
+def _est_premier(p):
+    """
+    Test de primalité de Miller-Rabin, déterministe pour p < 3.3 * 10^24.
+    """
+    if p < 2:
+        return False
+    bases = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+    for a in bases:
+        if p % a == 0:
+            return p == a
+    d, s = p - 1, 0
+    while d % 2 == 0:
+        d, s = d // 2, s + 1
+    for a in bases:
+        x = pow(a, d, p)
+        if x == 1 or x == p - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % p
+            if x == p - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _factorielles_inverses(n, p):
+    """
+    Inverses modulo p (premier, p > n) de 0!, 1!, ..., n!.
+    """
+    fact = [1] * (n+1)
+    for i in range(1, n+1):
+        fact[i] = fact[i-1] * i % p
+    inv = [1] * (n+1)
+    inv[n] = pow(fact[n], -1, p)
+    for i in range(n, 0, -1):
+        inv[i-1] = inv[i] * i % p
+    return inv
+
+
+def _somme_dobinski(n, p, a, b, c):
+    """
+    Calcule modulo p (premier, p > n, c inversible) la somme
+
+        sum_{j=0}^{n} (a j + b)^n c^j / j! * sum_{i=0}^{n-j} (-c)^i / i!
+
+    forme finie des formules de Dobinski : a=1, b=0, c=1 donne le nombre de Bell ;
+    a=2, b=1, c=1/2 le nombre de Dowling ; a=2, b=0, c=1/2 le nombre de Dowling sans bloc zéro.
+    """
+    inv_fact = _factorielles_inverses(n, p)
+    # Sommes partielles de la série de exp(-c).
+    partielles = [0] * (n+1)
+    s, puissance = 0, 1
+    for i in range(n+1):
+        s = (s + puissance * inv_fact[i]) % p
+        partielles[i] = s
+        puissance = puissance * (-c) % p
+    res, puissance = 0, 1
+    for j in range(n+1):
+        res = (res + pow(a*j + b, n, p) * puissance % p * inv_fact[j] % p * partielles[n-j]) % p
+        puissance = puissance * c % p
+    return res
+
+
+def _somme_dobinski_exacte(n, a, b, q):
+    """
+    Valeur exacte de e^(-1/q) sum_{j>=0} (a j + b)^n / (q^j j!) (formules de
+    Dobinski : a=1, b=0, q=1 pour Bell ; a=2, b=1, q=2 pour Dowling ; a=2,
+    b=0, q=2 pour Dowling sans bloc zéro).
+
+    La série est tronquée au rang J où les termes sont inférieurs à e^-40 et
+    décroissent au moins de moitié ; la somme rationnelle est calculée par
+    scindage binaire, puis multipliée par e^(-1/q) en virgule fixe avec 64 bits
+    de garde, et arrondie.
+    """
+    def log_terme(j):
+        base = a*j + b
+        if base == 0:
+            return 0.0 if n == 0 else -math.inf
+        return n * math.log(base) - j * math.log(q) - math.lgamma(j + 1)
+
+    J = 1
+    while not (log_terme(J) < -40 and log_terme(J + 1) < log_terme(J) - math.log(2)):
+        J += 1
+
+    # S(l, r) = sum_{j=l}^{r-1} (a j + b)^n prod_{i=j+1}^{r-1} q i, et Q(l, r) = prod_{i=l}^{r-1} q i.
+    def scinde(l, r):
+        if r - l == 1:
+            return (a*l + b)**n, q*l
+        m = (l + r) // 2
+        S_g, Q_g = scinde(l, m)
+        S_d, Q_d = scinde(m, r)
+        return S_g * Q_d + S_d, Q_g * Q_d
+
+    N, _ = scinde(0, J + 1)
+    D = q**J * math.factorial(J)
+    P = max(N.bit_length() - D.bit_length(), 0) + 64
+    # e^(-1/q) 2^P, à quelques unités près
+    E, terme, i = 0, 1 << P, 0
+    while terme:
+        E += -terme if i % 2 else terme
+        i += 1
+        terme //= q * i
+    return (2*N*E + (D << P)) // (2*D << P)
 
-    memo[n] = res
+
+# Au-delà de ce rang, les sommes exactes de lignes passent par _somme_dobinski_exacte.
+_SEUIL_DOBINSKI = 64
+
+
+def _bell_triangle_modulo(n, modulo):
+    """
+    Nombres de Bell B(0), ..., B(n) modulo un entier, par le triangle de Bell
+    (Aitken) calculé ligne par ligne avec des sommes cumulées NumPy.
+    """
+    dtype = np.int64 if (n + 2) * modulo < 2**63 else object
+    bell = [1 % modulo]
+    ligne = np.array([1 % modulo], dtype=dtype)
+    for i in range(1, n+1):
+        nouvelle = np.empty(i+1, dtype=dtype)
+        nouvelle[0] = ligne[-1]
+        nouvelle[1:] = (ligne[-1] + np.cumsum(ligne)) % modulo
+        ligne = nouvelle
+        bell.append(int(ligne[0]))
+    return bell
+
+
+def _bell_modulo(n, modulo):
+    """
+    Nombre de Bell B(n) modulo un entier, avec des raccourcis pour les modules premiers :
+    - si p > n, la formule de Dobinski tronquée (O(n log n)) ;
+    - sinon, la congruence de Touchard B(m + p) = B(m) + B(m + 1) (mod p).
+    Ce second cas construit le triangle de Bell jusqu'à la ligne p-1, en O(p^2) :
+    il n'est rapide que pour de petits p (calcule_bell_table(10**5, 99991)
+    prend de l'ordre d'une minute).
+    Un module composé (10**9 par exemple) n'a pas de raccourci : il retombe sur
+    le triangle de Bell complet, en O(n^2) opérations (B(10**5) modulo 10**9
+    prend de l'ordre de 45 s).
+    """
+    if _est_premier(modulo):
+        p = modulo
+        if p > n:
+            return _somme_dobinski(n, p, 1, 0, 1)
+        bell = _bell_triangle_modulo(p - 1, p)
+        bell.append((bell[0] + bell[1]) % p)
+        for m in range(1, n - p + 1):
+            bell.append((bell[m] + bell[m+1]) % p)
+        return bell[n]
+    return _bell_triangle_modulo(n, modulo)[n]
+
+
+def _coeff_bino_lucas(n, k, p):
+    """
+    Coefficient binomial C(n, k) modulo p premier, par le théorème de Lucas.
+    """
+    res = 1
+    while n > 0 or k > 0:
+        n, n_i = divmod(n, p)
+        k, k_i = divmod(k, p)
+        if k_i > n_i:
+            return 0
+        res = res * (math.comb(n_i, k_i) % p) % p
+    return res
+
+
+def _stirling_modulo(n, k, p):
+    """
+    S(n, k) modulo p premier avec p > k, par la formule explicite
+    S(n, k) = 1/k! sum_j (-1)^(k-j) C(k, j) j^n.
+    """
+    inv_fact = _factorielles_inverses(k, p)
+    res = 0
+    for j in range(k+1):
+        terme = pow(j, n, p) * inv_fact[j] % p * inv_fact[k-j] % p
+        res = (res + terme) % p if (k - j) % 2 == 0 else (res - terme) % p
     return res
 
 
+def coeff_bino_table(n, k, modulo=None):
+    """
+    Calcule le coefficient binomial C(n, k) avec le triangle de Pascal itératif
+    (modulo un entier si modulo est donné).
+    """
+    if modulo is not None:
+        return coeff_bino(n, k, modulo)
+    return _coeff_triangle("binomial", n, k)
+
+
+def calcule_stirling_table(n, k, modulo=None):
+    """
+    Calcule le nombre de Stirling de seconde espèce S(n, k) avec le triangle itératif
+    (modulo un entier si modulo est donné).
+    """
+    if modulo is not None and 0 < k <= n and k < modulo and _est_premier(modulo):
+        return _stirling_modulo(n, k, modulo)
+    return _coeff_triangle("stirling", n, k, modulo)
+
+
+def calcule_bell_table(n, modulo=None):
+    """
+    Calcule le nombre de Bell B(n) comme somme de la ligne n du triangle de Stirling
+    (modulo un entier si modulo est donné ; pour un module premier p <= n, le
+    coût est en O(p^2 + n), voir _bell_modulo).
+    """
+    if modulo is not None:
+        return _bell_modulo(n, modulo)
+    if n > _SEUIL_DOBINSKI:
+        return _somme_dobinski_exacte(n, 1, 0, 1)
+    return _somme_ligne("stirling", n)
+
+
 # ========== Partitions de type A ==========
 
 def partitionne_stirling_rec(lst, k):
@@ -307,86 +902,839 @@ def partitionne_bell(lst):
     return all_part
 
 
-# ========== Statistiques sur les permutations de type A ==========
+# ========== Génération paresseuse des partitions de type A ==========
 
-def liste_desc(perm):
+# Une partition des éléments de lst en k blocs est codée par un mot à croissance
+# restreinte (RGS) : rgs[j] est le numéro du bloc qui contient lst[j], les blocs
+# étant numérotés dans l'ordre de leur premier élément.
+# Les générateurs ci-dessous ne gardent en mémoire qu'un seul RGS (O(n)), modifié
+# sur place, et produisent les partitions dans le même ordre que
+# partitionne_stirling_dyn et partitionne_bell.
+
+def _rgs_stirling(rgs, n, k):
     """
-    Retourne les indices i tels que σ(i) > σ(i+1).
+    Remplit rgs[:n] successivement avec tous les RGS de longueur n à k blocs,
+    dans l'ordre de partitionne_stirling_dyn, et rend la main après chacun.
     """
-    n = len(perm)
-    lst = [i for i in range(n-1) if perm[i] > perm[i+1]]
-    return lst
+    # Cas de base (mêmes que partitionne_stirling_dyn).
+    if k == 0 and n == 0:
+        yield
+        return
+    if (k == 0 or n == 0) or k > n:
+        return
+    if k == n:
+        rgs[:n] = range(n)
+        yield
+        return
+    if k == 1:
+        rgs[:n] = [0] * n
+        yield
+        return
 
+    # 1) Le dernier élément forme un nouveau bloc.
+    for _ in _rgs_stirling(rgs, n - 1, k - 1):
+        rgs[n-1] = k - 1
+        yield
 
-def liste_asc(perm):
+    # 2) Le dernier élément est ajouté à chacun des k blocs existants.
+    for _ in _rgs_stirling(rgs, n - 1, k):
+        for i in range(k):
+            rgs[n-1] = i
+            yield
+
+
+def _rgs_stirling_depuis(rgs, n, k, depart):
     """
-    Retourne les indices i tels que σ(i) < σ(i+1).
+    Comme _rgs_stirling, mais en commençant au RGS depart (de longueur n, à k blocs)
+    au lieu du premier RGS de l'ordre.
     """
-    n = len(perm)
-    lst = [i for i in range(n-1) if perm[i] < perm[i+1]]
-    return lst
+    if (k == 0 and n == 0) or k == n or k == 1:
+        yield from _rgs_stirling(rgs, n, k)
+        return
 
+    dernier = depart[n-1]
+    if max(depart[:n-1]) + 1 == k - 1:
+        # Le dernier élément de depart forme un nouveau bloc.
+        for _ in _rgs_stirling_depuis(rgs, n - 1, k - 1, depart):
+            rgs[n-1] = k - 1
+            yield
+        for _ in _rgs_stirling(rgs, n - 1, k):
+            for i in range(k):
+                rgs[n-1] = i
+                yield
+    else:
+        debut = dernier
+        for _ in _rgs_stirling_depuis(rgs, n - 1, k, depart):
+            for i in range(debut, k):
+                rgs[n-1] = i
+                yield
+            debut = 0
 
-def liste_exce(perm):
+
+def genere_rgs_stirling(n, k):
     """
-    Retourne les indices i tels que σ(i) > i.
+    Générateur des RGS (tuples) des partitions de [n] en k blocs, dans l'ordre
+    de partitionne_stirling_dyn.
     """
-    n = len(perm)
-    lst = [i for i in range(n-1) if perm[i] > i]
-    return lst
+    rgs = [0] * n
+    for _ in _rgs_stirling(rgs, n, k):
+        yield tuple(rgs)
 
 
-def liste_inv(perm):
+def genere_rgs_bell(n):
     """
-    Retourne les paires (i, j) avec i < j et σ(i) > σ(j).
+    Générateur des RGS (tuples) de toutes les partitions de [n], dans l'ordre
+    de partitionne_bell.
     """
-    n = len(perm)
-    lst = [(i, j) for i in range(n) for j in range(i+1, n) if perm[i] > perm[j]]
-    return lst
+    for k in range(n+1):
+        yield from genere_rgs_stirling(n, k)
 
 
-# ========== Partitions de type B ==========
+def rgs_vers_partition(rgs, lst, k=None):
+    """
+    Convertit un RGS en partition des éléments de lst (liste de k blocs).
+    """
+    if k is None:
+        k = max(rgs) + 1 if len(rgs) > 0 else 0
+    part = [[] for _ in range(k)]
+    for x, b in zip(lst, rgs):
+        part[b].append(x)
+    return part
 
-# Une partition de type B est une partition d'un ensemble ⟨n⟩ qui respecte les propriétés suivantes :
-# 1. Pour tout i ≥ 1, les blocs π2i et π2i−1 sont opposés, c'est-à-dire que π2i = −π2i−1,
-#    où −β représente l'ensemble des opposés des éléments de β (−β = {−a : a ∈ β}).
-# 2. Il existe un bloc spécial appelé le bloc zéro (π0), qui est symétrique, c'est-à-dire que si a ∈ π0,
-#    alors −a ∈ π0 également.
-#
-# Représentation d'Adler :
-# - Dans le bloc zéro, tous les éléments négatifs sont supprimés.
-# - Dans chaque bloc, les éléments sont triés par valeur absolue croissante.
-# - Pour chaque paire de blocs opposés, seul le bloc avec le premier élément positif est conservé.
 
-# Stratégie pour générer une partition de type B d'un ensemble de taille et divisée en k blocs :
-# 1.1. Récupérer une partition de type A d'un ensemble de taille n divisée en k blocs (liste de k sous-listes).
-# 1.2. Trier tous les éléments de chaque sous-liste par valeur croissante.
-# 1.3. Trier les sous-listes par valeur croissante de leur premier élément.
-# 1.4. Récupérer la liste des indices des éléments qui ne sont pas les premiers de leur bloc et pas dans le bloc zéro.
-# 2. Générer toutes les combinaisons des indices de la liste obtenue à l'étape 1.4. de longueur 0 à la longueur de la liste.
-# 3. Pour chaque combinaison d'indices, créer une nouvelle partition de type B en inversant le signe aux indices de la combinaison.
+def partition_vers_rgs(part):
+    """
+    Convertit une partition (blocs ordonnés par premier élément, éléments
+    triés) en RGS sur la liste triée de ses éléments.
+    """
+    labels = {x: b for b, bloc in enumerate(part) for x in bloc}
+    return tuple(labels[x] for x in sorted(labels, key=abs))
 
 
-def print_partitions(parts, length=-1, name="partitions", scope=5):
+def _par_lots(iterable, chunk_size):
     """
-    Affiche les partitions de manière lisible.
+    Regroupe les éléments d'un itérable en listes d'au plus chunk_size éléments.
     """
-    if len(parts) > 2 * scope:
-        for i in range(scope):
-            print(parts[i])
-        print("...")
-        for i in range(-scope, 0):
-            print(parts[i])
-    else:
-        for i in range(len(parts)):
-            print(parts[i])
-    print(f"Nombre de {name} pour n={length} : {len(parts)}")
+    lot = []
+    for x in iterable:
+        lot.append(x)
+        if len(lot) == chunk_size:
+            yield lot
+            lot = []
+    if lot:
+        yield lot
 
 
-def sort_partitions(partitions):
+def partitionne_stirling_lazy(lst, k, chunk_size=None):
+    """
+    Version paresseuse de partitionne_stirling_dyn : produit les partitions de
+    lst en k blocs une à une (ou par lots de chunk_size), dans le même ordre,
+    avec une mémoire de travail en O(n).
+    """
+    n = len(lst)
+    rgs = [0] * n
+    parts = (rgs_vers_partition(rgs, lst, k) for _ in _rgs_stirling(rgs, n, k))
+    if chunk_size is None:
+        return parts
+    return _par_lots(parts, chunk_size)
+
+
+def partitionne_bell_lazy(lst, chunk_size=None):
+    """
+    Version paresseuse de partitionne_bell : produit toutes les partitions de
+    lst une à une (ou par lots de chunk_size), dans le même ordre.
+    """
+    parts = (part for k in range(len(lst)+1) for part in partitionne_stirling_lazy(lst, k))
+    if chunk_size is None:
+        return parts
+    return _par_lots(parts, chunk_size)
+
+
+# ========== Lots compacts de partitions (tableaux NumPy) ==========
+
+# Un lot de N partitions d'un même ensemble de n éléments est stocké comme :
+# - elements : tableau (n,) des éléments, triés par valeur absolue croissante ;
+# - rgs : tableau (N, n) d'entiers courts, rgs[i, j] = bloc de elements[j] dans la i-ème partition ;
+# - signes : tableau de bits (N, ⌈n/8⌉) (np.packbits), bit à 1 si l'élément est barré (type B).
+# Les partitions de type B sont représentées sous forme d'Adler (sans les blocs opposés).
+
+def _dtype_labels(n):
+    """
+    Plus petit type entier signé pouvant contenir les numéros de blocs de [n].
+    """
+    if n <= np.iinfo(np.int8).max:
+        return np.int8
+    if n <= np.iinfo(np.int16).max:
+        return np.int16
+    return np.int32
+
+
+class PartitionBatch:
+    """
+    Lot compact de partitions de type A ou B (forme d'Adler) d'un même ensemble.
+    """
+
+    def __init__(self, rgs, elements, signes=None):
+        elements = np.asarray(elements)
+        n = len(elements)
+        rgs = np.asarray(rgs)
+        if rgs.ndim == 1:
+            rgs = rgs[None, :]
+        self.elements = elements
+        self.rgs = rgs.astype(_dtype_labels(n), copy=False)
+        if signes is None:
+            self.signes_bits = np.zeros((len(rgs), (n + 7) // 8), dtype=np.uint8)
+        else:
+            signes = np.asarray(signes, dtype=bool).reshape(rgs.shape)
+            self.signes_bits = np.packbits(signes, axis=1)
+
+    @classmethod
+    def from_parts(cls, parts, elements=None):
+        """
+        Construit un lot à partir de partitions sous forme de listes de blocs
+        (blocs ordonnés par premier élément, forme d'Adler pour le type B).
+        """
+        if elements is None:
+            elements = sorted(abs(x) for bloc in parts[0] for x in bloc) if len(parts) > 0 else []
+        elements = np.asarray(elements)
+        n = len(elements)
+        position = {int(x): j for j, x in enumerate(elements)}
+        rgs = np.zeros((len(parts), n), dtype=_dtype_labels(n))
+        signes = np.zeros((len(parts), n), dtype=bool)
+        for i, part in enumerate(parts):
+            if sum(len(bloc) for bloc in part) != n:
+                raise ValueError(f"La partition {part} ne porte pas sur les éléments {elements.tolist()}.")
+            for b, bloc in enumerate(part):
+                for x in bloc:
+                    rgs[i, position[abs(x)]] = b
+                    signes[i, position[abs(x)]] = x < 0
+        return cls(rgs, elements, signes)
+
+    def __len__(self):
+        return len(self.rgs)
+
+    @property
+    def n(self):
+        return len(self.elements)
+
+    @property
+    def signes(self):
+        """
+        Tableau booléen (N, n) des éléments barrés.
+        """
+        return np.unpackbits(self.signes_bits, axis=1, count=self.n).astype(bool)
+
+    def valeurs(self):
+        """
+        Tableau (N, n) des éléments signés de chaque partition.
+        """
+        return np.where(self.signes, -self.elements.astype(np.int64), self.elements.astype(np.int64))
+
+    def nb_blocs(self):
+        """
+        Nombre de blocs de chaque partition.
+        """
+        if self.n == 0:
+            return np.zeros(len(self), dtype=np.int64)
+        return self.rgs.max(axis=1).astype(np.int64) + 1
+
+    def __getitem__(self, idx):
+        if isinstance(idx, (int, np.integer)):
+            idx = range(len(self))[idx]
+            return self.to_parts(slice(idx, idx+1))[0]
+        batch = PartitionBatch.__new__(PartitionBatch)
+        batch.elements = self.elements
+        batch.rgs = self.rgs[idx]
+        batch.signes_bits = self.signes_bits[idx]
+        return batch
+
+    def __iter__(self):
+        for debut in range(0, len(self), _TAILLE_MORCEAU):
+            yield from self.to_parts(slice(debut, debut + _TAILLE_MORCEAU))
+
+    def to_parts(self, idx=slice(None), complete=False):
+        """
+        Convertit (une partie de) le lot en liste de partitions sous forme de
+        listes de blocs. Si complete est vrai, les blocs opposés sont ajoutés.
+        """
+        # On ne décompresse les signes que des lignes demandées.
+        lot = self[idx]
+        rgs = lot.rgs.tolist()
+        valeurs = lot.valeurs().tolist() if lot.signes_bits.any() else [lot.elements.tolist()] * len(rgs)
+        parts = [rgs_vers_partition(r, v) for r, v in zip(rgs, valeurs)]
+        if complete:
+            parts = complete_parts_B(parts)
+        return parts
+
+
+def _etend_rgs(niveau, m, ks, dtype, out=None):
+    """
+    Passe des tableaux de RGS de longueur m-1 (niveau[j] pour j blocs) à ceux de
+    longueur m, pour chaque nombre de blocs de ks, selon la récurrence de
+    partitionne_stirling_dyn. Si out est donné, les résultats y sont écrits à la suite.
+    """
+    nouveau = {}
+    debut = 0
+    for j in ks:
+        morceaux = []
+        # 1) Le dernier élément forme un nouveau bloc.
+        if j - 1 in niveau and len(niveau[j-1]) > 0:
+            a = niveau[j-1]
+            morceaux.append((a, np.full(len(a), j - 1, dtype=dtype)))
+        # 2) Le dernier élément est ajouté à chacun des j blocs existants.
+        if j in niveau and len(niveau[j]) > 0:
+            a = niveau[j]
+            morceaux.append((np.repeat(a, j, axis=0), np.tile(np.arange(j, dtype=dtype), len(a))))
+        taille = sum(len(col) for _, col in morceaux)
+        bloc = np.empty((taille, m), dtype=dtype) if out is None else out[debut:debut+taille]
+        pos = 0
+        for prefixes, col in morceaux:
+            bloc[pos:pos+len(col), :m-1] = prefixes
+            bloc[pos:pos+len(col), m-1] = col
+            pos += len(col)
+        nouveau[j] = bloc
+        debut += taille
+    return nouveau
+
+
+def rgs_stirling_array(n, k):
+    """
+    Tableau (S(n, k), n) des RGS des partitions de [n] en k blocs, dans l'ordre
+    de partitionne_stirling_dyn, construit par blocs vectorisés.
+    """
+    dtype = _dtype_labels(n)
+    niveau = {0: np.zeros((1, 0), dtype=dtype)}
+    for m in range(1, n+1):
+        niveau = _etend_rgs(niveau, m, range(max(1, k - (n - m)), min(m, k) + 1), dtype)
+    return niveau.get(k, np.zeros((0, n), dtype=dtype))
+
+
+def rgs_bell_array(n):
+    """
+    Tableau (B(n), n) des RGS de toutes les partitions de [n], dans l'ordre de
+    partitionne_bell.
+    """
+    dtype = _dtype_labels(n)
+    if n == 0:
+        return np.zeros((1, 0), dtype=dtype)
+    niveau = {0: np.zeros((1, 0), dtype=dtype)}
+    for m in range(1, n):
+        niveau = _etend_rgs(niveau, m, range(1, m+1), dtype)
+    # Le dernier niveau est écrit directement dans le tableau final.
+    out = np.empty((calcule_bell_dyn(n), n), dtype=dtype)
+    _etend_rgs(niveau, n, range(1, n+1), dtype, out=out)
+    return out
+
+
+def partitionne_stirling_batch(lst, k):
+    """
+    Version compacte de partitionne_stirling_dyn : renvoie un PartitionBatch.
+    """
+    return PartitionBatch(rgs_stirling_array(len(lst), k), sorted(lst, key=abs))
+
+
+def partitionne_bell_batch(lst):
+    """
+    Version compacte de partitionne_bell : renvoie un PartitionBatch.
+    """
+    return PartitionBatch(rgs_bell_array(len(lst)), sorted(lst, key=abs))
+
+
+_TAILLE_MORCEAU = 1 << 16
+
+
+def _par_morceaux(batch, fonction):
+    """
+    Applique une fonction vectorisée à un lot, par morceaux de _TAILLE_MORCEAU
+    partitions pour borner la mémoire intermédiaire.
+    """
+    if len(batch) <= _TAILLE_MORCEAU:
+        return fonction(batch)
+    return np.concatenate([fonction(batch[i:i+_TAILLE_MORCEAU]) for i in range(0, len(batch), _TAILLE_MORCEAU)])
+
+
+def _premiers_derniers(batch):
+    """
+    Pour chaque partition et chaque numéro de bloc b, renvoie les positions du
+    premier et du dernier élément du bloc, ainsi qu'un masque d'existence du bloc.
+    """
+    N, n = batch.rgs.shape
+    premiers = np.zeros((N, n), dtype=np.int64)
+    derniers = np.zeros((N, n), dtype=np.int64)
+    existe = np.zeros((N, n), dtype=bool)
+    lignes = np.arange(N)
+    for j in range(n):
+        derniers[lignes, batch.rgs[:, j]] = j
+    for j in reversed(range(n)):
+        premiers[lignes, batch.rgs[:, j]] = j
+        existe[lignes, batch.rgs[:, j]] = True
+    return premiers, derniers, existe
+
+
+def _consecutifs_meme_bloc(batch):
+    """
+    Masque (N, n-1) des positions j telles que elements[j] et elements[j] + 1
+    sont tous deux dans le même bloc.
+    """
+    e = batch.elements
+    consecutifs = np.abs(e[1:]) == np.abs(e[:-1]) + 1
+    return (batch.rgs[:, 1:] == batch.rgs[:, :-1]) & consecutifs
+
+
+def _is_separated_batch(batch):
+    v = batch.valeurs()
+    return ~(_consecutifs_meme_bloc(batch) & (v[:, 1:] * v[:, :-1] > 0)).any(axis=1)
+
+
+def _is_strongly_separated_batch(batch):
+    return ~_consecutifs_meme_bloc(batch).any(axis=1)
+
+
+def _is_merge_free_batch(batch):
+    e = np.abs(batch.elements)
+    premiers, derniers, existe = _premiers_derniers(batch)
+    fusion = (e[derniers[:, :-1]] < e[premiers[:, 1:]]) & existe[:, 1:]
+    return ~fusion.any(axis=1)
+
+
+def _is_normal_merge_free_batch(batch):
+    v = batch.valeurs()
+    N, n = v.shape
+    fusion = np.zeros(N, dtype=bool)
+    for b in range(1, n):
+        prec = batch.rgs == b - 1
+        cour = batch.rgs == b
+        max_prec = np.where(prec, v, np.iinfo(np.int64).min).max(axis=1)
+        min_cour = np.where(cour, v, np.iinfo(np.int64).max).min(axis=1)
+        fusion |= cour.any(axis=1) & (max_prec < min_cour)
+    return ~fusion
+
+
+def _compte_inversions_batch(batch):
+    v = batch.valeurs()
+    e = np.abs(batch.elements)
+    premiers, _, existe = _premiers_derniers(batch)
+    inv_count = np.zeros(len(batch), dtype=np.int64)
+    for b in range(1, batch.n):
+        # Éléments des blocs précédant le bloc b et supérieurs à son minimum.
+        min_b = e[premiers[:, b]][:, None]
+        test = (batch.rgs < b) & (v > min_b) & existe[:, b, None]
+        inv_count += test.sum(axis=1)
+    return inv_count
+
+
+def _get_signable_inds_batch(batch):
+    n = batch.rgs.shape[1]
+    premiers, _, _ = _premiers_derniers(batch)
+    # Les positions premières de bloc sont celles où j == premiers[rgs[j]].
+    est_premier = np.take_along_axis(premiers, batch.rgs.astype(np.int64), axis=1) == np.arange(n)
+    signable = ~est_premier
+    if n > 0 and batch.elements[0] == 0:
+        signable &= batch.rgs != 0
+    return signable
+
+
+# ========== Statistiques sur les permutations de type A ==========
+
+def liste_desc(perm):
+    """
+    Retourne les indices i tels que σ(i) > σ(i+1).
+    """
+    n = len(perm)
+    lst = [i for i in range(n-1) if perm[i] > perm[i+1]]
+    return lst
+
+
+def liste_asc(perm):
+    """
+    Retourne les indices i tels que σ(i) < σ(i+1).
+    """
+    n = len(perm)
+    lst = [i for i in range(n-1) if perm[i] < perm[i+1]]
+    return lst
+
+
+def liste_exce(perm):
+    """
+    Retourne les indices i tels que σ(i) > i.
+    """
+    n = len(perm)
+    lst = [i for i in range(n-1) if perm[i] > i]
+    return lst
+
+
+def liste_inv(perm):
+    """
+    Retourne les paires (i, j) avec i < j et σ(i) > σ(j).
+    """
+    n = len(perm)
+    lst = [(i, j) for i in range(n) for j in range(i+1, n) if perm[i] > perm[j]]
+    return lst
+
+
+# ========== Inversions en O(n log n) : code de Lehmer et table d'inversions ==========
+
+# Arbre de Fenwick sur les rangs 1..n : chaque case i contient la somme des
+# effectifs des rangs ]i - lowbit(i), i], ce qui permet d'ajouter un élément et
+# de compter les éléments de rang <= r en O(log n).
+
+def _fenwick_ajoute(arbre, i):
+    while i < len(arbre):
+        arbre[i] += 1
+        i += i & -i
+
+
+def _fenwick_somme(arbre, i):
+    s = 0
+    while i > 0:
+        s += arbre[i]
+        i -= i & -i
+    return s
+
+
+def _rangs(perm):
+    """
+    Rang (de 1 à n) de chaque valeur de perm.
+    """
+    rangs = {v: r for r, v in enumerate(sorted(perm), start=1)}
+    return [rangs[v] for v in perm]
+
+
+def code_lehmer(perm):
+    """
+    Retourne le code de Lehmer de perm : L[i] = #{j > i : σ(j) < σ(i)}.
+    """
+    n = len(perm)
+    rangs = _rangs(perm)
+    arbre = [0] * (n+1)
+    code = [0] * n
+    for i in range(n-1, -1, -1):
+        code[i] = _fenwick_somme(arbre, rangs[i] - 1)
+        _fenwick_ajoute(arbre, rangs[i])
+    return code
+
+
+def table_inversions(perm):
+    """
+    Retourne la table d'inversions de perm : pour la r-ième plus petite valeur v,
+    I[r] = #{j : j est à gauche de v et σ(j) > v}.
+    """
+    n = len(perm)
+    rangs = _rangs(perm)
+    arbre = [0] * (n+1)
+    table = [0] * n
+    for i in range(n):
+        table[rangs[i] - 1] = i - _fenwick_somme(arbre, rangs[i])
+        _fenwick_ajoute(arbre, rangs[i])
+    return table
+
+
+def compte_inv(perm):
+    """
+    Compte les inversions de perm en O(n log n), sans les lister (voir liste_inv).
+    """
+    return sum(code_lehmer(perm))
+
+
+def code_lehmer_batch(perms):
+    """
+    Codes de Lehmer de toutes les lignes d'un tableau (N, n) de permutations,
+    avec un arbre de Fenwick par ligne mis à jour de façon vectorisée.
+    """
+    perms = np.asarray(perms)
+    N, n = perms.shape
+    rangs = perms.argsort(axis=1, kind="stable").argsort(axis=1) + 1
+    lignes = np.arange(N)
+    # La colonne n+1 sert de puits pour les indices sortis de l'arbre.
+    arbre = np.zeros((N, n+2), dtype=np.int64)
+    code = np.zeros((N, n), dtype=np.int64)
+    etapes = max(n, 1).bit_length() + 1
+    for i in range(n-1, -1, -1):
+        idx = rangs[:, i] - 1
+        for _ in range(etapes):
+            code[:, i] += arbre[lignes, idx]
+            idx = idx - (idx & -idx)
+        idx = rangs[:, i].copy()
+        for _ in range(etapes):
+            arbre[lignes, idx] += 1
+            idx = np.where(idx <= n, idx + (idx & -idx), n+1)
+            idx = np.minimum(idx, n+1)
+    return code
+
+
+# ========== Statistiques vectorisées sur des lots de permutations ==========
+
+# Les fonctions suivantes prennent un tableau (N, n) de permutations (une par ligne)
+# et renvoient, pour chaque ligne, le nombre d'éléments de la liste correspondante
+# (liste_desc, liste_asc, liste_exce, liste_inv).
+
+def compte_desc_batch(perms):
+    """
+    Nombre de descentes de chaque permutation du lot.
+    """
+    perms = np.asarray(perms)
+    return (perms[:, :-1] > perms[:, 1:]).sum(axis=1)
+
+
+def compte_asc_batch(perms):
+    """
+    Nombre d'ascensions de chaque permutation du lot.
+    """
+    perms = np.asarray(perms)
+    return (perms[:, :-1] < perms[:, 1:]).sum(axis=1)
+
+
+def compte_exce_batch(perms):
+    """
+    Nombre d'excédences de chaque permutation du lot (mêmes indices que liste_exce).
+    """
+    perms = np.asarray(perms)
+    n = perms.shape[1]
+    return (perms[:, :n-1] > np.arange(n-1)).sum(axis=1)
+
+
+# Au-delà de cette taille, les inversions sont comptées par arbres de Fenwick (O(n log n)).
+_SEUIL_INV_FENWICK = 64
+
+
+def compte_inv_batch(perms):
+    """
+    Nombre d'inversions de chaque permutation du lot.
+    """
+    perms = np.asarray(perms)
+    n = perms.shape[1]
+    if n > _SEUIL_INV_FENWICK:
+        return code_lehmer_batch(perms).sum(axis=1)
+    inv_count = np.zeros(len(perms), dtype=np.int64)
+    for i in range(n-1):
+        inv_count += (perms[:, i, None] > perms[:, i+1:]).sum(axis=1)
+    return inv_count
+
+
+# Statistiques disponibles : fonction de lot et valeur maximale pour des permutations de taille n.
+STATS_PERMUTATIONS = {
+    "des": (compte_desc_batch, lambda n: max(n-1, 0)),
+    "asc": (compte_asc_batch, lambda n: max(n-1, 0)),
+    "exc": (compte_exce_batch, lambda n: max(n-1, 0)),
+    "inv": (compte_inv_batch, lambda n: n*(n-1) // 2),
+}
+
+
+def distribution_stats_batch(perms, stats=("des", "inv"), chunk_size=1 << 16):
+    """
+    Histogramme joint des statistiques stats (clés de STATS_PERMUTATIONS) sur
+    un ensemble de permutations de même taille n.
+
+    Args:
+        perms: tableau (N, n), liste de permutations, ou itérable de tableaux
+            (chunk, n) traités l'un après l'autre.
+        stats (tuple of str): statistiques à croiser, par exemple ("des", "inv").
+        chunk_size (int): nombre de permutations traitées à la fois.
+
+    Returns:
+        Tableau d'effectifs h tel que h[a, b, ...] est le nombre de permutations
+        dont les statistiques valent a, b, ...
+    """
+    if isinstance(perms, (list, tuple)):
+        perms = np.asarray(perms)
+    if isinstance(perms, np.ndarray):
+        morceaux = (perms[i:i+chunk_size] for i in range(0, max(len(perms), 1), chunk_size))
+    else:
+        morceaux = perms
+
+    hist = None
+    for morceau in morceaux:
+        morceau = np.asarray(morceau)
+        if hist is None:
+            n = morceau.shape[1]
+            forme = tuple(STATS_PERMUTATIONS[s][1](n) + 1 for s in stats)
+            hist = np.zeros(int(np.prod(forme)), dtype=np.int64)
+        for i in range(0, len(morceau), chunk_size):
+            sous_morceau = morceau[i:i+chunk_size]
+            valeurs = [STATS_PERMUTATIONS[s][0](sous_morceau) for s in stats]
+            hist += np.bincount(np.ravel_multi_index(valeurs, forme), minlength=len(hist))
+    if hist is None:
+        raise ValueError("Aucune permutation à traiter.")
+    return hist.reshape(forme)
+
+
+def distribution_des_exc(n, chunk_size=1 << 16):
+    """
+    Table jointe T[k, e] du nombre de permutations de [n] ayant k descentes et
+    e excédences, obtenue en parcourant S_n par tableaux (permute_lazy) avec
+    distribution_stats_batch. Le coût est en O(n! n) : utilisable jusqu'à
+    n = 11 ou 12 environ.
+    """
+    if n == 0:
+        return np.ones((1, 1), dtype=np.int64)
+    return distribution_stats_batch(permute_lazy(list(range(n)), chunk_size), ("des", "exc"), chunk_size)
+
+
+# ========== Distributions des statistiques sur S_n (récurrences) ==========
+
+# Les distributions sont calculées sans énumérer les permutations :
+# - descentes (nombres eulériens) : A(n, k) = (k+1) A(n-1, k) + (n-k) A(n-1, k-1) ;
+#   les excédences (liste_exce) ont la même distribution ;
+# - inversions (nombres de Mahon) : I_n(q) = prod_{i=1}^{n} [i]_q ;
+# - (des, inv) : on construit la permutation de gauche à droite en ne retenant
+#   que le rang r du dernier élément parmi les i premiers. Ajouter un élément
+#   de rang r parmi i+1 crée i-r inversions, et une descente si r <= rang du
+#   précédent (qui devient alors r+1 ou plus).
+# Le couple (des, exc) n'a pas de récurrence ici : l'insertion d'un élément
+# modifie les excédences de toutes les positions suivantes, sans état fini à
+# retenir. Sa table est obtenue par énumération (distribution_des_exc, plus haut).
+# Les tableaux sont en int64 tant que n! < 2^62 (ou que le modulo le permet),
+# en entiers Python sinon.
+
+def _dtype_permutations(n, modulo):
+    if modulo is None:
+        return np.int64 if math.factorial(n) < 2**62 else object
+    return np.int64 if modulo * (n + 1)**2 < 2**62 else object
+
+
+def ligne_euler(n, modulo=None):
+    """
+    Nombres eulériens A(n, 0), ..., A(n, n-1) : nombre de permutations de [n]
+    ayant k descentes (ou k excédences).
+    """
+    dtype = _dtype_permutations(n, modulo)
+    ligne = np.ones(1, dtype=dtype)
+    for m in range(2, n + 1):
+        k = np.arange(m, dtype=dtype)
+        nouvelle = np.zeros(m, dtype=dtype)
+        nouvelle[:m-1] += (k[:m-1] + 1) * ligne
+        nouvelle[1:] += (m - k[1:]) * ligne
+        ligne = nouvelle if modulo is None else nouvelle % modulo
+    return ligne
+
+
+def ligne_mahonian(n, modulo=None):
+    """
+    Nombres de Mahon I(n, 0), ..., I(n, n(n-1)/2) : nombre de permutations de
+    [n] ayant d inversions. Le produit par [i]_q est une somme glissante
+    (différence de sommes cumulées) ; la ligne étant symétrique, seule sa
+    première moitié est calculée. Quelques secondes pour n = 500 en entiers exacts.
+    """
+    dtype = _dtype_permutations(n, modulo)
+    # moitie[d] = I(i, d) pour d <= degre // 2.
+    moitie = np.ones(1, dtype=dtype)
+    degre = 0
+    for i in range(2, n + 1):
+        nouveau_degre = degre + i - 1
+        taille = nouveau_degre // 2 + 1
+        # Ligne précédente complétée par symétrie jusqu'à l'indice taille - 1.
+        ligne = np.concatenate((moitie, moitie[:degre + 1 - len(moitie)][::-1]))[:taille]
+        # nouvelle[d] = ligne[d-i+1] + ... + ligne[d]
+        nouvelle = np.cumsum(ligne)
+        nouvelle[i:] -= nouvelle[:taille - i]
+        moitie = nouvelle if modulo is None else nouvelle % modulo
+        degre = nouveau_degre
+    return np.concatenate((moitie, moitie[:degre + 1 - len(moitie)][::-1]))
+
+
+def table_des_inv(n, modulo=None):
+    """
+    Table jointe T[k, d] du nombre de permutations de [n] ayant k descentes et
+    d inversions. Après i éléments, la récurrence porte sur i x i x i^2/2 états,
+    soit O(n^5) au total : quelques secondes pour n = 40 en entiers exacts (ou
+    n = 60 modulo un entier). La table elle-même compte n^3/2 coefficients de
+    l'ordre de n! : n = 500 est hors de portée, y compris modulo.
+    """
+    dtype = _dtype_permutations(n, modulo)
+    if n == 0:
+        return np.ones((1, 1), dtype=dtype)
+    # G[r, k, d] : permutations de longueur i dont le dernier élément a le rang r.
+    G = np.ones((1, 1, 1), dtype=dtype)
+    for i in range(1, n):
+        degre = G.shape[2] - 1
+        # avant[r] = somme des G[l] pour l < r, apres[r] = pour l >= r.
+        avant = np.zeros((i + 1, i, degre + 1), dtype=dtype)
+        np.cumsum(G, axis=0, out=avant[1:])
+        apres = avant[-1] - avant
+        nouveau = np.zeros((i + 1, i + 1, degre + i + 1), dtype=dtype)
+        for r in range(i + 1):
+            bloc = nouveau[r, :, i - r:i - r + degre + 1]
+            bloc[:i] += avant[r]
+            bloc[1:] += apres[r]
+        G = nouveau if modulo is None else nouveau % modulo
+    table = G.sum(axis=0)
+    return table if modulo is None else table % modulo
+
+
+def verifie_tables_permutations(n_max=7):
+    """
+    Compare les tables ci-dessus aux comptes de liste_desc, liste_exce et
+    liste_inv sur permute_rec(range(n)), pour n <= n_max. Renvoie la liste des
+    n pour lesquels une table diffère.
+    """
+    ecarts = []
+    for n in range(n_max + 1):
+        perms = permute_rec(list(range(n)))
+        des = np.array([len(liste_desc(p)) for p in perms])
+        exc = np.array([len(liste_exce(p)) for p in perms])
+        inv = np.array([len(liste_inv(p)) for p in perms])
+        degre = n * (n - 1) // 2
+        euler = np.bincount(des, minlength=max(n, 1))
+        mahon = np.bincount(inv, minlength=degre + 1)
+        joint_inv = np.zeros((max(n, 1), degre + 1), dtype=np.int64)
+        np.add.at(joint_inv, (des, inv), 1)
+        joint_exc = np.zeros((max(n, 1), max(n, 1)), dtype=np.int64)
+        np.add.at(joint_exc, (des, exc), 1)
+        ok = (list(ligne_euler(n)) == list(euler)
+              and list(np.bincount(exc, minlength=max(n, 1))) == list(euler)
+              and list(ligne_mahonian(n)) == list(mahon)
+              and np.array_equal(table_des_inv(n), joint_inv)
+              and np.array_equal(distribution_des_exc(n), joint_exc))
+        if not ok:
+            ecarts.append(n)
+    return ecarts
+
+
+# ========== Partitions de type B ==========
+
+# Une partition de type B est une partition d'un ensemble ⟨n⟩ qui respecte les propriétés suivantes :
+# 1. Pour tout i ≥ 1, les blocs π2i et π2i−1 sont opposés, c'est-à-dire que π2i = −π2i−1,
+#    où −β représente l'ensemble des opposés des éléments de β (−β = {−a : a ∈ β}).
+# 2. Il existe un bloc spécial appelé le bloc zéro (π0), qui est symétrique, c'est-à-dire que si a ∈ π0,
+#    alors −a ∈ π0 également.
+#
+# Représentation d'Adler :
+# - Dans le bloc zéro, tous les éléments négatifs sont supprimés.
+# - Dans chaque bloc, les éléments sont triés par valeur absolue croissante.
+# - Pour chaque paire de blocs opposés, seul le bloc avec le premier élément positif est conservé.
+
+# Stratégie pour générer une partition de type B d'un ensemble de taille et divisée en k blocs :
+# 1.1. Récupérer une partition de type A d'un ensemble de taille n divisée en k blocs (liste de k sous-listes).
+# 1.2. Trier tous les éléments de chaque sous-liste par valeur croissante.
+# 1.3. Trier les sous-listes par valeur croissante de leur premier élément.
+# 1.4. Récupérer la liste des indices des éléments qui ne sont pas les premiers de leur bloc et pas dans le bloc zéro.
+# 2. Générer toutes les combinaisons des indices de la liste obtenue à l'étape 1.4. de longueur 0 à la longueur de la liste.
+# 3. Pour chaque combinaison d'indices, créer une nouvelle partition de type B en inversant le signe aux indices de la combinaison.
+
+
+def print_partitions(parts, length=-1, name="partitions", scope=5):
+    """
+    Affiche les partitions de manière lisible.
+    """
+    if len(parts) > 2 * scope:
+        for i in range(scope):
+            print(parts[i])
+        print("...")
+        for i in range(-scope, 0):
+            print(parts[i])
+    else:
+        for i in range(len(parts)):
+            print(parts[i])
+    print(f"Nombre de {name} pour n={length} : {len(parts)}")
+
+
+def sort_partitions(partitions):
     """
     Trie les partitions de type B (ou A) selon la représentation d'Adler.
+    Un PartitionBatch est déjà sous forme d'Adler et est renvoyé tel quel.
     """
+    if isinstance(partitions, PartitionBatch):
+        return partitions
     sorted_partitions = []
     for part in partitions:
         # Trier les blocs par valeur croissante de leur premier élément
@@ -401,7 +1749,10 @@ def sort_partitions(partitions):
 def get_signable_inds(part):
     """
     Récupère la liste des indices des éléments qui ne sont pas les premiers de leur bloc et pas dans le bloc zéro.
+    Pour un PartitionBatch, renvoie le masque (N, n) des éléments signables.
     """
+    if isinstance(part, PartitionBatch):
+        return _par_morceaux(part, _get_signable_inds_batch)
     liste_signable_inds = []
     ind = 0
     for i in range(len(part)):
@@ -417,6 +1768,7 @@ def convert_part_A_to_B(part_A, permu_signed_inds):
     Convertit une partition de type A en une partition de type B en inversant le signe
     aux indices spécifiés par permu_signed_inds.
     """
+    permu_signed_inds = set(permu_signed_inds)
     ind = 0
     part_B = []
     for i in range(len(part_A)):
@@ -441,11 +1793,25 @@ def get_all_parts_B_from_A(parts_A, complete = False):
         #part_A = sort_partitions([part_A])[0]
         # Récupérer la liste des indices signables
         liste_signable_inds = get_signable_inds(part_A)
-        # Générer toutes les combinaisons d'indices signables
-        combinaisons = combine_dyn(liste_signable_inds)
-        for comb in combinaisons:
+        m = len(liste_signable_inds)
+        # L'élément signable i porte le bit m-1-i de t (ordre de combine_dyn).
+        indice_du_bit = liste_signable_inds[::-1]
+        valeurs = [x for bloc in part_A for x in bloc]
+        bornes = []
+        ind = 0
+        for bloc in part_A:
+            bornes.append((ind, ind + len(bloc)))
+            ind += len(bloc)
+        for t in range(1 << m):
+            # Passer de t-1 à t change les bits de t ^ (t-1) (deux en moyenne).
+            if t > 0:
+                change = t ^ (t - 1)
+                while change:
+                    d = (change & -change).bit_length() - 1
+                    valeurs[indice_du_bit[d]] = -valeurs[indice_du_bit[d]]
+                    change &= change - 1
             # Convertir la partition de type A en type B
-            part_B = convert_part_A_to_B(part_A, comb)
+            part_B = [valeurs[a:b] for a, b in bornes]
             all_part_B.append(part_B)
 
     if complete:
@@ -469,30 +1835,793 @@ def complete_parts_B(parts_B):
         all_part_B.append(new_part)
     return all_part_B
 
-def calcule_dowling(n):
+
+# ========== Génération directe des partitions de type B ==========
+
+# Une partition de type B (forme d'Adler) est codée par le RGS de sa partition
+# de type A et par l'ensemble de ses éléments barrés, parmi les éléments
+# signables (voir get_signable_inds). Les signatures sont parcourues comme dans
+# get_all_parts_B_from_A : le i-ème élément signable (ordre des blocs) est
+# barré si le bit m-1-i du compteur t est à 1, t allant de 0 à 2^m - 1.
+
+def _parts_B_depuis_rgs(rgs, lst, zero_block):
+    """
+    Générateur des partitions de type B (forme d'Adler) associées au RGS rgs,
+    dans l'ordre de get_all_parts_B_from_A.
+    """
+    k = max(rgs) + 1 if len(rgs) > 0 else 0
+    blocs = [[] for _ in range(k)]
+    for j, b in enumerate(rgs):
+        blocs[b].append(j)
+    signables = _signables_ordonnes(rgs, lst, zero_block)
+    m = len(signables)
+    valeurs = list(lst)
+    for t in range(1 << m):
+        for i, j in enumerate(signables):
+            valeurs[j] = -lst[j] if (t >> (m - 1 - i)) & 1 else lst[j]
+        yield [[valeurs[j] for j in bloc] for bloc in blocs]
+
+
+def partitionne_B_lazy(lst, k=None, complete=False, chunk_size=None):
+    """
+    Produit une à une (ou par lots de chunk_size) les partitions de type B de lst
+    (en k blocs si k est donné), dans l'ordre de
+    get_all_parts_B_from_A(partitionne_bell(lst)) (ou de partitionne_stirling_dyn(lst, k)),
+    sans construire les partitions de type A ni les combinaisons d'indices.
+    """
+    elements = sorted(lst, key=abs)
+    n = len(elements)
+    zero_block = n > 0 and elements[0] == 0
+    ks = range(n+1) if k is None else [k]
+    rgs = [0] * n
+    parts = (part for nb in ks for _ in _rgs_stirling(rgs, n, nb)
+             for part in _parts_B_depuis_rgs(rgs, elements, zero_block))
+    if complete:
+        parts = (complete_parts_B([part])[0] for part in parts)
+    if chunk_size is None:
+        return parts
+    return _par_lots(parts, chunk_size)
+
+
+def _signes_batch_B(batch_A):
+    """
+    Développe un lot de partitions de type A en toutes ses partitions de type B :
+    renvoie les RGS répétés et les signes (booléens), dans l'ordre de get_all_parts_B_from_A.
+    """
+    N, n = batch_A.rgs.shape
+    signable = _get_signable_inds_batch(batch_A)
+    m = signable.sum(axis=1)
+    poids = np.left_shift(1, m)
+    # Rang de chaque position parmi les signables, dans l'ordre des blocs.
+    cle = np.where(signable, batch_A.rgs.astype(np.int64) * n + np.arange(n), n * n)
+    ordre = np.argsort(cle, axis=1, kind="stable")
+    rang = np.empty((N, n), dtype=np.int64)
+    np.put_along_axis(rang, ordre, np.broadcast_to(np.arange(n), (N, n)), axis=1)
+    decalage = np.where(signable, m[:, None] - 1 - rang, 0)
+
+    debuts = np.cumsum(poids) - poids
+    lignes = np.repeat(np.arange(N), poids)
+    t = np.arange(len(lignes)) - debuts[lignes]
+    signes = signable[lignes] & ((t[:, None] >> decalage[lignes]) & 1).astype(bool)
+    return batch_A.rgs[lignes], signes
+
+
+def partitionne_B_batch(lst, k=None):
+    """
+    Version compacte de partitionne_B_lazy : renvoie un PartitionBatch des
+    partitions de type B de lst (en k blocs si k est donné), dans le même ordre.
+    """
+    batch_A = partitionne_bell_batch(lst) if k is None else partitionne_stirling_batch(lst, k)
+    morceaux_rgs, morceaux_signes = [], []
+    # Le développement se fait par morceaux d'environ _TAILLE_MORCEAU partitions
+    # de type B pour borner la mémoire des tableaux intermédiaires.
+    poids = np.left_shift(1, get_signable_inds(batch_A).sum(axis=1))
+    coupes = np.searchsorted(np.cumsum(poids), np.arange(_TAILLE_MORCEAU, poids.sum(), _TAILLE_MORCEAU))
+    bornes = np.unique(np.concatenate(([0], coupes + 1, [len(batch_A)])))
+    for debut, fin in zip(bornes[:-1], bornes[1:]):
+        rgs, signes = _signes_batch_B(batch_A[debut:fin])
+        morceaux_rgs.append(rgs)
+        morceaux_signes.append(np.packbits(signes, axis=1))
+    batch = PartitionBatch.__new__(PartitionBatch)
+    batch.elements = batch_A.elements
+    n = len(batch.elements)
+    if morceaux_rgs:
+        batch.rgs = np.concatenate(morceaux_rgs)
+        batch.signes_bits = np.concatenate(morceaux_signes)
+    else:
+        batch.rgs = np.zeros((0, n), dtype=_dtype_labels(n))
+        batch.signes_bits = np.zeros((0, (n + 7) // 8), dtype=np.uint8)
+    return batch
+
+
+def calcule_dowling(n, modulo=None):
     """
     Fonction pour calculer le nombre de partitions de type B selon la formule du nombre de Dowling
+
+            D(n) = sum_i C(n, i) sum_k 2^(n-i-k) S(n-i, k) = sum_k W(n, k)
+
+    calculé comme somme de la ligne n du triangle des nombres de Whitney W(n, k)
+    (modulo un entier si modulo est donné), ou, sans module et pour n au-delà
+    de _SEUIL_DOBINSKI, par la formule de Dobinski exacte.
     """
-    dn = 0
-    for i in range(n+1):
-        # coeff binomial C(n, i)
-        c = coeff_bino_dyn(n, i)
-        # somme sur k
-        s = 0
-        for k in range(n - i + 1):
-            s += (2**(n - i - k)) * calcule_stirling_dyn(n - i, k)
-        dn += c * s
-    return dn
+    if modulo is not None and modulo > max(n, 2) and _est_premier(modulo):
+        return _somme_dobinski(n, modulo, 2, 1, pow(2, -1, modulo))
+    if modulo is None and n > _SEUIL_DOBINSKI:
+        return _somme_dobinski_exacte(n, 2, 1, 2)
+    return _somme_ligne("dowling", n, modulo)
 
 
-def calcule_dowling_no_zero_block(n):
+def calcule_dowling_no_zero_block(n, modulo=None):
     """
     Fonction pour calculer le nombre de partitions de type B sans bloc zéro selon la formule du nombre de Dowling
+
+            sum_k 2^(n-k) S(n, k)
+    """
+    if modulo is not None and modulo > max(n, 2) and _est_premier(modulo):
+        return _somme_dobinski(n, modulo, 2, 0, pow(2, -1, modulo))
+    if modulo is None and n > _SEUIL_DOBINSKI:
+        return _somme_dobinski_exacte(n, 2, 0, 2)
+    return _somme_ligne("dowling_no_zero_block", n, modulo)
+
+
+# ========== Cache persistant sur disque ==========
+
+# Cache optionnel (voir active_cache_disque) : les énumérations sont stockées en
+# tableaux binaires de largeur fixe (RGS, bits de signes, éléments) au format
+# .npy et rechargées par projection en mémoire (np.load(..., mmap_mode="r")),
+# sans créer d'objets Python ; les lignes des triangles de TRIANGLES y sont
+# aussi gardées, indexées par (famille, n, modulo). Les fichiers sont rangés
+# dans un sous-répertoire par version du format (packcombi-cache-v<N>) ; au-delà de taille_max octets,
+# les entrées les moins récemment utilisées sont supprimées.
+
+_VERSION_CACHE_DISQUE = 1
+_PREFIXE_CACHE_DISQUE = "packcombi-cache-v"
+_cache_disque = None
+_verrou_disque = threading.Lock()
+
+
+def active_cache_disque(repertoire, taille_max=1 << 30):
+    """
+    Active le cache sur disque dans repertoire (créé si besoin), limité à
+    taille_max octets. Seuls les sous-répertoires d'autres versions du format
+    (_PREFIXE_CACHE_DISQUE suivi du numéro de version) sont supprimés ; le reste
+    de repertoire n'est pas touché.
+    """
+    global _cache_disque
+    courant = f"{_PREFIXE_CACHE_DISQUE}{_VERSION_CACHE_DISQUE}"
+    dossier = os.path.join(repertoire, courant)
+    os.makedirs(dossier, exist_ok=True)
+    for nom in os.listdir(repertoire):
+        version = nom[len(_PREFIXE_CACHE_DISQUE):]
+        if nom.startswith(_PREFIXE_CACHE_DISQUE) and version.isdigit() and nom != courant:
+            shutil.rmtree(os.path.join(repertoire, nom), ignore_errors=True)
+    with _verrou_disque:
+        _cache_disque = {"dossier": dossier, "taille_max": taille_max}
+
+
+def desactive_cache_disque():
+    """
+    Désactive le cache sur disque (les fichiers sont conservés).
+    """
+    global _cache_disque
+    with _verrou_disque:
+        _cache_disque = None
+
+
+def vide_cache_disque():
+    """
+    Supprime toutes les entrées du cache sur disque actif.
+    """
+    with _verrou_disque:
+        if _cache_disque is None:
+            return
+        for nom in os.listdir(_cache_disque["dossier"]):
+            os.remove(os.path.join(_cache_disque["dossier"], nom))
+
+
+def _chemins_cache(cle, parties):
+    return {p: os.path.join(_cache_disque["dossier"], f"{cle}.{p}.npy") for p in parties}
+
+
+def _lit_cache(cle, parties):
+    """
+    Projette en mémoire les tableaux de l'entrée cle, ou renvoie None si elle est absente.
+    """
+    if _cache_disque is None:
+        return None
+    chemins = _chemins_cache(cle, parties)
+    try:
+        tableaux = {p: np.load(c, mmap_mode="r") for p, c in chemins.items()}
+    except (FileNotFoundError, ValueError):
+        return None
+    # La date de modification sert de date de dernier usage pour l'éviction.
+    for c in chemins.values():
+        os.utime(c)
+    return tableaux
+
+
+def _ecrit_cache(cle, tableaux):
+    """
+    Écrit les tableaux de l'entrée cle (de façon atomique), puis fait de la
+    place si la taille maximale est dépassée.
+    """
+    if _cache_disque is None:
+        return
+    chemins = _chemins_cache(cle, tableaux)
+    for p, tableau in tableaux.items():
+        temporaire = f"{chemins[p]}.{os.getpid()}.tmp"
+        with open(temporaire, "wb") as f:
+            np.save(f, tableau)
+        os.replace(temporaire, chemins[p])
+    _evince_cache(garde=set(chemins.values()))
+
+
+def _evince_cache(garde=()):
+    with _verrou_disque:
+        dossier = _cache_disque["dossier"]
+        fichiers = []
+        for nom in os.listdir(dossier):
+            chemin = os.path.join(dossier, nom)
+            if nom.endswith(".npy"):
+                info = os.stat(chemin)
+                fichiers.append((info.st_mtime, info.st_size, chemin))
+        total = sum(taille for _, taille, _ in fichiers)
+        for _, taille, chemin in sorted(fichiers):
+            if total <= _cache_disque["taille_max"]:
+                break
+            if chemin not in garde:
+                os.remove(chemin)
+                total -= taille
+
+
+def _cle_enumeration(lst, k, type_B):
+    empreinte = hashlib.sha1(repr(sorted(lst, key=abs)).encode()).hexdigest()[:16]
+    return f"parts-{'B' if type_B else 'A'}-{'bell' if k is None else k}-{empreinte}"
+
+
+def partitions_cachees(lst, k=None, type_B=False):
+    """
+    PartitionBatch des partitions de lst (en k blocs si k est donné), de type A
+    (ordre de partitionne_bell / partitionne_stirling_dyn) ou de type B (ordre
+    de get_all_parts_B_from_A). Avec le cache sur disque actif, le lot est lu
+    par projection en mémoire s'il a déjà été calculé, et sinon calculé puis
+    enregistré.
+    """
+    parties = ("rgs", "signes", "elements")
+    cle = _cle_enumeration(lst, k, type_B)
+    tableaux = _lit_cache(cle, parties)
+    if tableaux is None:
+        if type_B:
+            batch = partitionne_B_batch(lst, k)
+        elif k is None:
+            batch = partitionne_bell_batch(lst)
+        else:
+            batch = partitionne_stirling_batch(lst, k)
+        if _cache_disque is None:
+            return batch
+        _ecrit_cache(cle, {"rgs": batch.rgs, "signes": batch.signes_bits, "elements": batch.elements})
+        tableaux = _lit_cache(cle, parties)
+    batch = PartitionBatch.__new__(PartitionBatch)
+    batch.rgs = tableaux["rgs"]
+    batch.signes_bits = tableaux["signes"]
+    batch.elements = np.asarray(tableaux["elements"])
+    return batch
+
+
+def _cle_ligne(famille, n, modulo):
+    return f"ligne-{famille}-{n}" + ("" if modulo is None else f"-mod{modulo}")
+
+
+def _lit_ligne_disque(famille, n, modulo):
+    """
+    Ligne de triangle du cache sur disque (même forme que ligne_triangle), ou None.
+    """
+    tableaux = _lit_cache(_cle_ligne(famille, n, modulo), ("ligne",))
+    if tableaux is None:
+        return None
+    ligne = tableaux["ligne"]
+    if ligne.dtype == np.uint8:
+        # Grands entiers : un entier par ligne, en octets gros-boutistes.
+        valeurs = [int.from_bytes(bytes(octets), "big") for octets in ligne]
+    else:
+        valeurs = [int(x) for x in ligne]
+    if modulo is None:
+        return tuple(valeurs)
+    mult_max = max(TRIANGLES[famille](k) for k in range(n+1))
+    resultat = np.array(valeurs, dtype=np.int64 if (mult_max + 1) * modulo < 2**63 else object)
+    resultat.flags.writeable = False
+    return resultat
+
+
+def _ecrit_ligne_disque(famille, n, modulo, ligne):
+    if _cache_disque is None:
+        return
+    valeurs = [int(x) for x in ligne]
+    if max(valeurs, default=0) < 2**63:
+        tableau = np.array(valeurs, dtype=np.int64)
+    else:
+        largeur = (max(valeurs).bit_length() + 7) // 8
+        tableau = np.array([list(x.to_bytes(largeur, "big")) for x in valeurs], dtype=np.uint8)
+    _ecrit_cache(_cle_ligne(famille, n, modulo), {"ligne": tableau})
+
+
+# ========== Export et lecture en flux ==========
+
+# Les énumérations sont écrites morceau par morceau, à mémoire constante :
+# - format binaire : en-tête _MAGIQUE_FLUX, puis pour chaque morceau sa taille
+#   sur 8 octets (petit-boutiste) suivie d'une archive np.savez_compressed
+#   (rgs, signes, elements pour un lot de partitions ; perms pour des permutations) ;
+# - NDJSON : une partition (liste de blocs) ou une permutation par ligne,
+#   compressé en gzip si le nom de fichier se termine par .gz.
+# Les morceaux sont des PartitionBatch, des tableaux (chunk, n) de
+# permutations ou des listes de partitions ou de permutations, comme ceux des
+# générateurs *_lazy avec chunk_size.
+
+_MAGIQUE_FLUX = b"PCMB\x01"
+
+
+def _normalise_morceau(morceau):
+    """
+    Convertit un morceau en PartitionBatch (partitions) ou en tableau (permutations).
+    Une liste dont tous les objets sont vides ([[]] : partition ou permutation de
+    l'ensemble vide) est ambiguë, et une partition en forme complète
+    (complete_parts_B) n'a pas de codage binaire : les deux sont refusées.
+    """
+    if isinstance(morceau, PartitionBatch) or isinstance(morceau, np.ndarray):
+        return morceau
+    morceau = list(morceau)
+    premier = next((objet for objet in morceau if len(objet) > 0), None)
+    if premier is None:
+        if len(morceau) > 0:
+            raise ValueError("Morceau ambigu (objets tous vides) : le passer en PartitionBatch "
+                             "ou en tableau (N, 0) de permutations.")
+        return np.array(morceau)
+    if isinstance(premier[0], list):
+        for part in morceau:
+            valeurs = [abs(x) for bloc in part for x in bloc]
+            if len(set(valeurs)) != len(valeurs):
+                raise ValueError(f"La partition {part} est en forme complète : le format binaire "
+                                 "attend la forme d'Adler.")
+        return PartitionBatch.from_parts(morceau)
+    return np.array(morceau)
+
+
+def ecrit_flux_binaire(chemin, morceaux):
+    """
+    Écrit les morceaux dans chemin au format binaire compressé et renvoie le
+    nombre d'objets écrits.
+    """
+    total = 0
+    with open(chemin, "wb") as f:
+        f.write(_MAGIQUE_FLUX)
+        for morceau in morceaux:
+            morceau = _normalise_morceau(morceau)
+            if len(morceau) == 0:
+                continue
+            tampon = io.BytesIO()
+            if isinstance(morceau, PartitionBatch):
+                np.savez_compressed(tampon, rgs=morceau.rgs, signes=morceau.signes_bits,
+                                    elements=morceau.elements)
+            else:
+                np.savez_compressed(tampon, perms=morceau)
+            donnees = tampon.getvalue()
+            f.write(len(donnees).to_bytes(8, "little"))
+            f.write(donnees)
+            total += len(morceau)
+    return total
+
+
+def lit_flux_binaire(chemin):
+    """
+    Relit un fichier écrit par ecrit_flux_binaire, morceau par morceau
+    (PartitionBatch ou tableau de permutations).
+    """
+    with open(chemin, "rb") as f:
+        if f.read(len(_MAGIQUE_FLUX)) != _MAGIQUE_FLUX:
+            raise ValueError(f"{chemin} n'est pas un flux binaire packcombi.")
+        while True:
+            entete = f.read(8)
+            if len(entete) < 8:
+                return
+            archive = np.load(io.BytesIO(f.read(int.from_bytes(entete, "little"))))
+            if "perms" in archive:
+                yield archive["perms"]
+            else:
+                batch = PartitionBatch.__new__(PartitionBatch)
+                batch.rgs = archive["rgs"]
+                batch.signes_bits = archive["signes"]
+                batch.elements = archive["elements"]
+                yield batch
+
+
+def _ouvre_ndjson(chemin, mode):
+    if chemin.endswith(".gz"):
+        return gzip.open(chemin, mode + "t", encoding="utf-8")
+    return open(chemin, mode, encoding="utf-8")
+
+
+def ecrit_flux_ndjson(chemin, morceaux):
+    """
+    Écrit les morceaux dans chemin au format NDJSON (gzip si chemin finit par
+    .gz) et renvoie le nombre d'objets écrits.
+    """
+    total = 0
+    with _ouvre_ndjson(chemin, "w") as f:
+        for morceau in morceaux:
+            if isinstance(morceau, PartitionBatch):
+                objets = morceau.to_parts()
+            elif isinstance(morceau, np.ndarray):
+                objets = morceau.tolist()
+            else:
+                objets = morceau
+            for objet in objets:
+                f.write(json.dumps(objet, separators=(",", ":")))
+                f.write("\n")
+                total += 1
+    return total
+
+
+def lit_flux_ndjson(chemin, chunk_size=None):
+    """
+    Relit un fichier NDJSON objet par objet (ou par listes d'au plus chunk_size objets).
+    """
+    def objets():
+        with _ouvre_ndjson(chemin, "r") as f:
+            for ligne in f:
+                if ligne.strip():
+                    yield json.loads(ligne)
+    if chunk_size is None:
+        return objets()
+    return _par_lots(objets(), chunk_size)
+
+
+# ========== Rang et dérang des partitions de type A et B ==========
+
+# Les partitions sont numérotées dans l'ordre de partitionne_stirling_dyn (k fixé)
+# ou de partitionne_bell (k = None), et les partitions de type B dans l'ordre de
+# get_all_parts_B_from_A appliqué à ces listes. Les éléments de lst sont supposés
+# triés par ordre croissant ; s'ils contiennent 0, le bloc de 0 est le bloc zéro.
+#
+# Chaque partition de type A compte pour un poids w = 2^m (nombre de façons de
+# signer ses m éléments signables), w = 1 pour le type A. En ajoutant le j-ème
+# élément à un préfixe p (k blocs) :
+# - s'il ouvre un nouveau bloc, le rang pondéré ne change pas ;
+# - sinon, s'il rejoint le bloc l, rang = V(j-1, k-1) + c(k) * rang(p) + w(p) * pre(l),
+# où V(j, k) est le nombre pondéré de préfixes de longueur j à k blocs, mult(l) le
+# nombre de signes possibles dans le bloc l, c(k) = sum_l mult(l) et pre(l) = sum_{l' < l} mult(l').
+
+def _triangle_lignes(famille, n):
     """
-    wn = 0
-    for k in range(0, n+1):
-        wn += (2**(n - k)) * calcule_stirling_dyn(n, k)
-    return wn
+    Lignes 0 à n du triangle famille (voir TRIANGLES), lues par ligne_triangle :
+    chaque ligne se déduit de la précédente, déjà dans le cache des lignes.
+    """
+    return [ligne_triangle(famille, m) for m in range(n+1)]
+
+
+def _parametres_rang(n, type_B, zero_block):
+    """
+    Retourne les fonctions (V, c, pre, mult, label) du schéma de rang pondéré,
+    label(q) étant le bloc l tel que pre(l) <= q < pre(l+1).
+    """
+    if not type_B:
+        lignes = _triangle_lignes("stirling", n)
+        V = lambda m, k: lignes[m][k] if 0 <= k <= m else 0
+        return V, (lambda k: k), (lambda l: l), (lambda l: 1), (lambda q: q)
+    if not zero_block:
+        lignes = _triangle_lignes("dowling_no_zero_block", n)
+        V = lambda m, k: lignes[m][k] if 0 <= k <= m else 0
+        return V, (lambda k: 2*k), (lambda l: 2*l), (lambda l: 2), (lambda q: q // 2)
+    # Avec bloc zéro, le bloc 0 ne peut pas recevoir d'éléments barrés.
+    lignes = _triangle_lignes("dowling", max(n-1, 0))
+    V = lambda m, k: (1 if k == 0 else 0) if m == 0 else (lignes[m-1][k-1] if 1 <= k <= m else 0)
+    return (V, (lambda k: 2*k - 1), (lambda l: max(2*l - 1, 0)), (lambda l: 1 if l == 0 else 2),
+            (lambda q: (q + 1) // 2))
+
+
+def _rang_pondere(rgs, params):
+    """
+    Rang pondéré, poids et nombre de blocs d'un RGS.
+    """
+    V, c, pre, mult, _ = params
+    r, w, k = 0, 1, 0
+    for j, l in enumerate(rgs, start=1):
+        if l == k:
+            k += 1
+        else:
+            r = V(j-1, k-1) + c(k)*r + w*pre(l)
+            w *= mult(l)
+    return r, w, k
+
+
+def _unrang_pondere(r, n, k, params):
+    """
+    RGS à k blocs de rang pondéré contenant r, et position de r dans son poids.
+    """
+    V, c, pre, mult, label = params
+    # Passe descendante : on repère les nouveaux blocs en suivant une position
+    # contenue dans l'intervalle du préfixe courant.
+    nouveau = [False] * n
+    positions = [0] * (n+1)
+    nb_blocs = [0] * (n+1)
+    for j in range(n, 0, -1):
+        positions[j], nb_blocs[j] = r, k
+        if r < V(j-1, k-1):
+            nouveau[j-1] = True
+            k -= 1
+        else:
+            r = (r - V(j-1, k-1)) // c(k)
+    # Passe montante : les blocs rejoints se lisent une fois le préfixe connu.
+    rgs = [0] * n
+    rang, w = 0, 1
+    for j in range(1, n+1):
+        k = nb_blocs[j]
+        if nouveau[j-1]:
+            rgs[j-1] = k - 1
+        else:
+            reste = positions[j] - V(j-1, k-1) - c(k)*rang
+            l = label(reste // w)
+            rgs[j-1] = l
+            rang = positions[j] - reste + w*pre(l)
+            w *= mult(l)
+    return rgs, positions[n] - rang
+
+
+def _signables_ordonnes(rgs, elements, zero_block):
+    """
+    Indices (dans elements) des éléments signables, dans l'ordre des blocs
+    utilisé par get_signable_inds.
+    """
+    k = max(rgs) + 1 if len(rgs) > 0 else 0
+    blocs = [[] for _ in range(k)]
+    for j, b in enumerate(rgs):
+        blocs[b].append(j)
+    debut = 1 if zero_block else 0
+    return [j for bloc in blocs[debut:] for j in bloc[1:]]
+
+
+def _decalage_bell(n, k, params):
+    """
+    Nombre pondéré de partitions à moins de k blocs (ordre de partitionne_bell).
+    """
+    V = params[0]
+    return sum(V(n, i) for i in range(k))
+
+
+def nb_partitions(n, k=None, type_B=False, zero_block=False):
+    """
+    Nombre de partitions de n éléments (en k blocs si k est donné), de type A ou B.
+    Avec zero_block, les n éléments comprennent 0.
+    """
+    params = _parametres_rang(n, type_B, zero_block)
+    if k is None:
+        return _decalage_bell(n, n+1, params)
+    return params[0](n, k)
+
+
+def rang_partition(part, k=None):
+    """
+    Rang d'une partition de type A dans partitionne_stirling_dyn(lst, k)
+    (ou dans partitionne_bell(lst) si k est None).
+    """
+    rgs = partition_vers_rgs(part)
+    params = _parametres_rang(len(rgs), False, False)
+    r, _, nb = _rang_pondere(rgs, params)
+    if k is None:
+        r += _decalage_bell(len(rgs), nb, params)
+    return r
+
+
+def unrang_partition(r, lst, k=None):
+    """
+    Partition de type A de rang r dans partitionne_stirling_dyn(lst, k)
+    (ou dans partitionne_bell(lst) si k est None).
+    """
+    n = len(lst)
+    params = _parametres_rang(n, False, False)
+    total = _decalage_bell(n, n+1, params) if k is None else params[0](n, k)
+    if not 0 <= r < total:
+        raise IndexError(f"Rang {r} hors de [0, {total}).")
+    if k is None:
+        k = 0
+        while r >= params[0](n, k):
+            r -= params[0](n, k)
+            k += 1
+    rgs, _ = _unrang_pondere(r, n, k, params)
+    return rgs_vers_partition(rgs, lst, k)
+
+
+def rang_partition_B(part_B, k=None):
+    """
+    Rang d'une partition de type B (forme d'Adler) dans
+    get_all_parts_B_from_A(partitionne_stirling_dyn(lst, k))
+    (ou get_all_parts_B_from_A(partitionne_bell(lst)) si k est None).
+    """
+    rgs = partition_vers_rgs(part_B)
+    negatifs = {abs(x) for bloc in part_B for x in bloc if x < 0}
+    elements = sorted((abs(x) for bloc in part_B for x in bloc))
+    zero_block = len(elements) > 0 and elements[0] == 0
+    params = _parametres_rang(len(rgs), True, zero_block)
+    r, _, nb = _rang_pondere(rgs, params)
+    if k is None:
+        r += _decalage_bell(len(rgs), nb, params)
+    # Position parmi les signatures, dans l'ordre de combine_dyn.
+    signables = _signables_ordonnes(rgs, elements, zero_block)
+    m = len(signables)
+    t = sum(1 << (m - 1 - i) for i, j in enumerate(signables) if elements[j] in negatifs)
+    return r + t
+
+
+def unrang_partition_B(r, lst, k=None):
+    """
+    Partition de type B (forme d'Adler) de rang r dans
+    get_all_parts_B_from_A(partitionne_stirling_dyn(lst, k))
+    (ou get_all_parts_B_from_A(partitionne_bell(lst)) si k est None).
+    """
+    n = len(lst)
+    zero_block = n > 0 and lst[0] == 0
+    params = _parametres_rang(n, True, zero_block)
+    total = _decalage_bell(n, n+1, params) if k is None else params[0](n, k)
+    if not 0 <= r < total:
+        raise IndexError(f"Rang {r} hors de [0, {total}).")
+    if k is None:
+        k = 0
+        while r >= params[0](n, k):
+            r -= params[0](n, k)
+            k += 1
+    rgs, t = _unrang_pondere(r, n, k, params)
+    signables = _signables_ordonnes(rgs, lst, zero_block)
+    m = len(signables)
+    valeurs = list(lst)
+    for i, j in enumerate(signables):
+        if (t >> (m - 1 - i)) & 1:
+            valeurs[j] = -valeurs[j]
+    return rgs_vers_partition(rgs, valeurs, k)
+
+
+def decoupe_rangs(total, nb_parts):
+    """
+    Découpe les rangs 0..total-1 en nb_parts intervalles contigus [debut, fin)
+    de tailles égales à une unité près.
+    """
+    bornes = [total * i // nb_parts for i in range(nb_parts + 1)]
+    return [(bornes[i], bornes[i+1]) for i in range(nb_parts)]
+
+
+def partitions_range(lst, debut, fin, k=None):
+    """
+    Générateur des partitions de type A de rangs debut à fin-1 (voir rang_partition),
+    par exemple pour reprendre ou répartir une énumération.
+    """
+    for r in range(debut, fin):
+        yield unrang_partition(r, lst, k)
+
+
+def partitions_B_range(lst, debut, fin, k=None):
+    """
+    Générateur des partitions de type B de rangs debut à fin-1 (voir rang_partition_B).
+    """
+    for r in range(debut, fin):
+        yield unrang_partition_B(r, lst, k)
+
+
+# ========== Énumération parallèle des partitions de type B ==========
+
+# Les partitions de type A sont réparties en intervalles contigus de rangs
+# (ordre de partitionne_bell, ou de partitionne_stirling_dyn si k est donné),
+# choisis pour contenir à peu près le même nombre de partitions de type B.
+# Chaque processus énumère ses partitions de type B, applique localement le
+# prédicat et la statistique, et ne renvoie qu'un histogramme (Counter).
+
+def _rgs_range(n, k, debut, fin):
+    """
+    Générateur des RGS (liste modifiée sur place) de rangs debut à fin-1 dans
+    l'ordre de partitionne_stirling_dyn (k fixé) ou de partitionne_bell (k = None).
+    """
+    params = _parametres_rang(n, False, False)
+    ks = [k] if k is not None else range(n+1)
+    r = debut
+    for nb in ks:
+        taille = params[0](n, nb)
+        if r >= taille:
+            r -= taille
+            continue
+        depart, _ = _unrang_pondere(r, n, nb, params)
+        rgs = list(depart)
+        for _ in _rgs_stirling_depuis(rgs, n, nb, depart):
+            if debut >= fin:
+                return
+            yield rgs
+            debut += 1
+        r = 0
+
+
+def _traite_shard(tache):
+    """
+    Agrège prédicat et statistique sur les partitions de type B issues des
+    partitions de type A de rangs debut à fin-1.
+    """
+    lst, k, debut, fin, predicat, statistique, complete = tache
+    zero_block = len(lst) > 0 and lst[0] == 0
+    hist = Counter()
+    for rgs in _rgs_range(len(lst), k, debut, fin):
+        for part in _parts_B_depuis_rgs(rgs, lst, zero_block):
+            if complete:
+                part = complete_parts_B([part])[0]
+            if predicat is not None and not predicat(part):
+                continue
+            hist[statistique(part) if statistique is not None else True] += 1
+    return hist
+
+
+def _bornes_shards(lst, k, nb_shards):
+    """
+    Intervalles de rangs de type A contenant chacun environ le même nombre de
+    partitions de type B.
+    """
+    n = len(lst)
+    zero_block = n > 0 and lst[0] == 0
+    params_A = _parametres_rang(n, False, False)
+    params_B = _parametres_rang(n, True, zero_block)
+    total_A = nb_partitions(n, k)
+    total_B = nb_partitions(n, k, True, zero_block)
+    if total_B == 0:
+        return []
+    bornes = [0]
+    for debut_B, _ in decoupe_rangs(total_B, nb_shards)[1:]:
+        # Rang de type A de la partition qui contient la partition de type B de rang debut_B.
+        r, nb = debut_B, k
+        if k is None:
+            nb = 0
+            while r >= params_B[0](n, nb):
+                r -= params_B[0](n, nb)
+                nb += 1
+        rgs, _ = _unrang_pondere(r, n, nb, params_B)
+        rang_A, _, _ = _rang_pondere(rgs, params_A)
+        if k is None:
+            rang_A += _decalage_bell(n, nb, params_A)
+        bornes.append(max(rang_A, bornes[-1]))
+    bornes.append(total_A)
+    return [(bornes[i], bornes[i+1]) for i in range(nb_shards) if bornes[i] < bornes[i+1]]
+
+
+def compte_parts_B_parallele(lst, predicat=None, statistique=None, k=None, complete=False,
+                             nb_processus=None, nb_shards=None):
+    """
+    Compte les partitions de type B de lst (en k blocs si k est donné) qui
+    vérifient predicat, ou renvoie l'histogramme de statistique sur celles-ci,
+    en répartissant l'énumération sur un pool de processus.
+
+    Args:
+        lst (list of int): éléments triés (avec 0 pour avoir un bloc zéro).
+        predicat (callable): par exemple is_separated ; None pour tout compter.
+        statistique (callable): par exemple compte_inversions ; None pour un simple comptage.
+        k (int): nombre de blocs, ou None pour toutes les partitions.
+        complete (bool): applique predicat et statistique à la forme complétée (complete_parts_B).
+        nb_processus (int): taille du pool (None : nombre de cœurs, 1 : sans pool).
+        nb_shards (int): nombre d'intervalles de rangs (par défaut 4 par processus).
+
+    predicat et statistique doivent être définis au niveau d'un module (picklables).
+
+    Returns:
+        Le nombre de partitions retenues, ou un Counter {valeur: effectif} si statistique est donnée.
+    """
+    if nb_shards is None:
+        nb_shards = 4 * (nb_processus or os.cpu_count() or 1)
+    taches = [(list(lst), k, debut, fin, predicat, statistique, complete)
+              for debut, fin in _bornes_shards(lst, k, nb_shards)]
+
+    hist = Counter()
+    if nb_processus == 1:
+        for tache in taches:
+            hist.update(_traite_shard(tache))
+    else:
+        with ProcessPoolExecutor(max_workers=nb_processus) as pool:
+            for h in pool.map(_traite_shard, taches):
+                hist.update(h)
+
+    if statistique is None:
+        return hist[True]
+    return hist
 
 
 # ========== Type B separated set partitions =========
@@ -500,7 +2629,10 @@ def calcule_dowling_no_zero_block(n):
 def is_separated(part):
     """
     Vérifie si une partition de type B est séparée.
+    Accepte aussi un PartitionBatch (résultat vectorisé, un par partition).
     """
+    if isinstance(part, PartitionBatch):
+        return _par_morceaux(part, _is_separated_batch)
     # Vérifier les blocs
     for bloc in part:
         # Vérifier si les éléments sont consécutifs
@@ -512,7 +2644,10 @@ def is_separated(part):
 def is_strongly_separated(part):
     """
     Vérifie si une partition de type B est fortement séparée.
+    Accepte aussi un PartitionBatch (résultat vectorisé, un par partition).
     """
+    if isinstance(part, PartitionBatch):
+        return _par_morceaux(part, _is_strongly_separated_batch)
     # Vérifier les blocs
     for bloc in part:
         # Vérifier si les éléments sont consécutifs
@@ -522,27 +2657,148 @@ def is_strongly_separated(part):
     return True
 
 
-# ========== Type B merging-free partitions =========
+# ========== Type B merging-free partitions =========
+
+def is_merge_free(part):
+    """
+    Vérifie si une partition de type B est merge-free.
+    Accepte aussi un PartitionBatch (résultat vectorisé, un par partition).
+    """
+    if isinstance(part, PartitionBatch):
+        return _par_morceaux(part, _is_merge_free_batch)
+    for i in range(1, len(part)):
+        # Vérifier si le maximum du bloc i-1 est inférieur au minimum du bloc i en valeur absolue
+        if max(abs(np.array(part[i-1]))) < min(abs(np.array(part[i]))):
+            return False
+    return True
+
+def is_normal_merge_free(part):
+    """
+    Vérifie si une partition de type B est merge-free.
+    Accepte aussi un PartitionBatch (résultat vectorisé, un par partition).
+    """
+    if isinstance(part, PartitionBatch):
+        return _par_morceaux(part, _is_normal_merge_free_batch)
+    for i in range(1, len(part)):
+        # Vérifier si le maximum du bloc i-1 est inférieur au minimum du bloc i.
+        if max(part[i-1]) < min(part[i]):
+            return False
+    return True
+
+
+# ========== Génération élaguée (séparées, fortement séparées, merge-free) ==========
+
+# Les contraintes ci-dessous se vérifient au fur et à mesure que les éléments
+# sont placés par valeur absolue croissante : une branche est coupée dès que le
+# préfixe ne peut plus être complété, si bien que le coût est proportionnel au
+# nombre de partitions valides (et non au nombre de Dowling).
+# - "separated" : x et x+1 ne sont pas dans le même bloc avec le même signe ;
+# - "strongly_separated" : x et x+1 ne sont jamais dans le même bloc ;
+# - "merge_free" : pour tout i, max |bloc i-1| > min |bloc i|. Quand le bloc i
+#   est ouvert, la paire (i-1, i) est en attente jusqu'à ce qu'un élément
+#   ultérieur rejoigne le bloc i-1 ; il faut donc au moins autant d'éléments
+#   restants que de paires en attente.
+CONTRAINTES_ELAGUEES = ("separated", "strongly_separated", "merge_free")
+
+
+def _rgs_elagues(lst, contraintes, k, type_B):
+    """
+    Générateur des couples (rgs, signes) (listes modifiées sur place) des
+    partitions de lst vérifiant toutes les contraintes, en ordre lexicographique
+    des RGS puis des signes (positif avant barré).
+    """
+    inconnues = set(contraintes) - set(CONTRAINTES_ELAGUEES)
+    if inconnues:
+        raise ValueError(f"Contraintes inconnues : {sorted(inconnues)}.")
+    separe = "separated" in contraintes
+    fortement = "strongly_separated" in contraintes
+    merge_free = "merge_free" in contraintes
+
+    n = len(lst)
+    zero_block = n > 0 and lst[0] == 0
+    rgs = [0] * n
+    signes = [False] * n
+    en_attente = [False] * (n + 1)
+
+    def parcours(j, nb, nb_attente):
+        restant = n - j
+        if k is not None and nb + restant < k:
+            return
+        if merge_free:
+            besoin = nb_attente
+            if k is not None and nb < k:
+                # Chaque bloc à ouvrir (sauf le premier) demande un élément de plus pour être résolu.
+                besoin += 2 * (k - nb) - (nb == 0)
+            if restant < besoin:
+                return
+        if j == n:
+            if k is None or nb == k:
+                yield rgs, signes
+            return
+        consecutif = j > 0 and abs(lst[j]) == abs(lst[j-1]) + 1
+        for b in range(nb + 1):
+            nouveau = b == nb
+            if nouveau and k is not None and nb == k:
+                continue
+            if consecutif and rgs[j-1] == b and fortement:
+                continue
+            signable = type_B and not nouveau and not (zero_block and b == 0)
+            delta = 0
+            if merge_free:
+                if nouveau and b > 0:
+                    en_attente[b] = True
+                    delta = 1
+                elif not nouveau and en_attente[b+1]:
+                    en_attente[b+1] = False
+                    delta = -1
+            for s in ((False, True) if signable else (False,)):
+                if separe and consecutif and rgs[j-1] == b and lst[j-1] != 0 and signes[j-1] == s:
+                    continue
+                rgs[j], signes[j] = b, s
+                yield from parcours(j + 1, nb + nouveau, nb_attente + delta)
+            signes[j] = False
+            if delta == 1:
+                en_attente[b] = False
+            elif delta == -1:
+                en_attente[b+1] = True
+
+    yield from parcours(0, 0, 0)
 
-def is_merge_free(part):
+
+def partitionne_elague_lazy(lst, contraintes, k=None, type_B=True, complete=False, chunk_size=None):
     """
-    Vérifie si une partition de type B est merge-free.
+    Produit une à une (ou par lots de chunk_size) les partitions de lst (en k
+    blocs si k est donné) vérifiant les contraintes (noms de CONTRAINTES_ELAGUEES),
+    de type B sous forme d'Adler (ou de type A si type_B est faux), en coupant
+    les branches dès qu'un préfixe ne peut plus être complété.
+
+    Donne les mêmes partitions que le filtrage de partitionne_B_lazy(lst, k) par
+    is_separated, is_strongly_separated ou is_merge_free, mais dans l'ordre
+    lexicographique des RGS.
     """
-    for i in range(1, len(part)):
-        # Vérifier si le maximum du bloc i-1 est inférieur au minimum du bloc i en valeur absolue
-        if max(abs(np.array(part[i-1]))) < min(abs(np.array(part[i]))):
-            return False
-    return True
+    elements = sorted(lst, key=abs)
+    parts = (rgs_vers_partition(rgs, [-x if s else x for x, s in zip(elements, signes)])
+             for rgs, signes in _rgs_elagues(elements, contraintes, k, type_B))
+    if complete:
+        parts = (complete_parts_B([part])[0] for part in parts)
+    if chunk_size is None:
+        return parts
+    return _par_lots(parts, chunk_size)
 
-def is_normal_merge_free(part):
+
+def partitionne_elague_batch(lst, contraintes, k=None, type_B=True):
     """
-    Vérifie si une partition de type B est merge-free.
+    Version compacte de partitionne_elague_lazy : renvoie un PartitionBatch.
     """
-    for i in range(1, len(part)):
-        # Vérifier si le maximum du bloc i-1 est inférieur au minimum du bloc i.
-        if max(part[i-1]) < min(part[i]):
-            return False
-    return True
+    elements = sorted(lst, key=abs)
+    n = len(elements)
+    rgs, signes = [], []
+    for r, s in _rgs_elagues(elements, contraintes, k, type_B):
+        rgs.append(list(r))
+        signes.append(list(s))
+    if not rgs:
+        return PartitionBatch(np.zeros((0, n)), elements)
+    return PartitionBatch(np.array(rgs), elements, np.array(signes, dtype=bool))
 
 
 # ========== Statistiques sur les partitions de type B ==========
@@ -550,7 +2806,10 @@ def is_normal_merge_free(part):
 def compte_inversions(part):
     """
     Compte le nombre d'inversions dans une partition.
+    Accepte aussi un PartitionBatch (résultat vectorisé, un par partition).
     """
+    if isinstance(part, PartitionBatch):
+        return _par_morceaux(part, _compte_inversions_batch)
     n = len(part)
     # On calcule le minimum de chaque bloc en valeur absolue
     lst_min = np.array([abs(np.array(bloc)).min() for bloc in part])
@@ -570,7 +2829,10 @@ def compte_inversions(part):
 def is_inversion_free(part):
     """
     Vérifie si une partition de type B est inversion-free
+    Accepte aussi un PartitionBatch (résultat vectorisé, un par partition).
     """
+    if isinstance(part, PartitionBatch):
+        return _par_morceaux(part, _compte_inversions_batch) == 0
     n = len(part)
     # On calcule le minimum de chaque bloc en valeur absolue
     lst_min = np.array([abs(np.array(bloc)).min() for bloc in part])
@@ -585,6 +2847,362 @@ def is_inversion_free(part):
     return True
 
 
+# ========== Parcours des signes en code de Gray ==========
+
+# Pour une partition de type A fixée, les signatures sont parcourues en code de
+# Gray réfléchi : deux partitions de type B successives ne diffèrent que par le
+# signe d'un élément. Chaque statistique enregistrée dans STATS_B_INCREMENTALES
+# est donnée par un couple (initialise, bascule) :
+# - initialise(rgs, elements, zero_block) renvoie un état (dict) pour la
+#   partition sans élément barré, dont etat["valeur"] est la statistique ;
+# - bascule(etat, j, barre) met à jour l'état quand l'élément j devient barré
+#   (barre vrai) ou redevient positif.
+
+def _init_inversions(rgs, elements, zero_block):
+    # Un élément positif x du bloc b crée une inversion avec chaque bloc
+    # ultérieur de minimum inférieur à |x| ; un élément barré n'en crée aucune.
+    k = max(rgs) + 1 if len(rgs) > 0 else 0
+    minimums = [None] * k
+    for j, b in enumerate(rgs):
+        if minimums[b] is None:
+            minimums[b] = abs(elements[j])
+    contributions = [sum(1 for m in minimums[b+1:] if m < abs(x)) for x, b in zip(elements, rgs)]
+    return {"valeur": sum(contributions), "contributions": contributions}
+
+
+def _bascule_inversions(etat, j, barre):
+    etat["valeur"] += -etat["contributions"][j] if barre else etat["contributions"][j]
+
+
+def _paires_separation(rgs, elements):
+    # Positions j telles que elements[j-1] et elements[j] sont consécutifs,
+    # non nuls et dans le même bloc.
+    return [j for j in range(1, len(rgs))
+            if rgs[j] == rgs[j-1] and abs(elements[j]) == abs(elements[j-1]) + 1 and elements[j-1] != 0]
+
+
+def _init_separation(rgs, elements, zero_block):
+    paires = _paires_separation(rgs, elements)
+    # Sans élément barré, toutes les paires sont de même signe.
+    etat = {"paires": set(paires), "signes": [False] * len(rgs), "mauvaises": len(paires)}
+    etat["valeur"] = etat["mauvaises"] == 0
+    return etat
+
+
+def _bascule_separation(etat, j, barre):
+    signes, paires = etat["signes"], etat["paires"]
+    for p in (j, j + 1):
+        if p in paires:
+            etat["mauvaises"] -= signes[p-1] == signes[p]
+    signes[j] = barre
+    for p in (j, j + 1):
+        if p in paires:
+            etat["mauvaises"] += signes[p-1] == signes[p]
+    etat["valeur"] = etat["mauvaises"] == 0
+
+
+def _init_nb_barres(rgs, elements, zero_block):
+    return {"valeur": 0}
+
+
+def _bascule_nb_barres(etat, j, barre):
+    etat["valeur"] += 1 if barre else -1
+
+
+STATS_B_INCREMENTALES = {
+    "inv": (_init_inversions, _bascule_inversions),
+    "sep": (_init_separation, _bascule_separation),
+    "neg": (_init_nb_barres, _bascule_nb_barres),
+}
+
+
+def enregistre_stat_B(nom, initialise, bascule):
+    """
+    Enregistre une statistique incrémentale (voir STATS_B_INCREMENTALES).
+    """
+    STATS_B_INCREMENTALES[nom] = (initialise, bascule)
+
+
+def parcours_gray_B(lst, stats=("inv", "sep"), k=None):
+    """
+    Parcourt les partitions de type B de lst (en k blocs si k est donné) en
+    changeant un seul signe à la fois, et produit pour chacune le triplet
+    (rgs, signes, valeurs) où valeurs sont les statistiques stats
+    (clés de STATS_B_INCREMENTALES). rgs et signes sont modifiés sur place.
+
+    Les partitions de type A sont parcourues dans l'ordre de partitionne_bell
+    (ou de partitionne_stirling_dyn), leurs signatures en code de Gray.
+    Avec "inv", compte_inversions est mis à jour en O(1) par pas ; avec "sep",
+    is_separated l'est en O(1).
+    """
+    fonctions = [STATS_B_INCREMENTALES[s] for s in stats]
+    elements = sorted(lst, key=abs)
+    n = len(elements)
+    zero_block = n > 0 and elements[0] == 0
+    ks = range(n+1) if k is None else [k]
+    rgs = [0] * n
+    for nb in ks:
+        for _ in _rgs_stirling(rgs, n, nb):
+            signables = _signables_ordonnes(rgs, elements, zero_block)
+            signes = [False] * n
+            etats = [init(rgs, elements, zero_block) for init, _ in fonctions]
+            yield rgs, signes, tuple(etat["valeur"] for etat in etats)
+            for g in range(1, 1 << len(signables)):
+                # Le bit qui change est le bit de poids faible de g.
+                j = signables[(g & -g).bit_length() - 1]
+                signes[j] = not signes[j]
+                for (_, bascule), etat in zip(fonctions, etats):
+                    bascule(etat, j, signes[j])
+                yield rgs, signes, tuple(etat["valeur"] for etat in etats)
+
+
+def distribution_stats_B(lst, stats=("inv", "sep"), k=None):
+    """
+    Distribution jointe des statistiques stats sur toutes les partitions de
+    type B de lst (en k blocs si k est donné), calculée par parcours_gray_B.
+
+    Returns:
+        Counter {(valeur de stats[0], valeur de stats[1], ...): effectif}.
+    """
+    return Counter(valeurs for _, _, valeurs in parcours_gray_B(lst, stats, k))
+
+
+# ========== Dénombrement des classes de type B (programmation dynamique) ==========
+
+# Les éléments 1, ..., n (précédés de 0 avec zero_block) sont insérés par ordre
+# croissant, chacun ouvrant un nouveau bloc ou rejoignant un bloc existant
+# (avec 2 signes possibles dans un bloc non nul de type B, 1 dans le bloc zéro
+# ou en type A). Chaque classe est comptée par un automate dont l'état ne retient
+# que le nombre b de blocs et ce qu'il faut savoir du passé pour la contrainte ;
+# les effectifs sont des tableaux (objets Python, donc exacts) indexés par b.
+
+def _reduit(tableau, modulo):
+    return tableau if modulo is None else tableau % modulo
+
+
+def _dp_separated(n, zero_block, type_B, fort, modulo):
+    # État : b et la position du dernier élément placé (t = 0 : bloc non nul,
+    # 1 : bloc zéro, 2 : c'est 0 lui-même). x et x+1 dans le même bloc demandent
+    # des signes opposés (impossible dans le bloc zéro, permis pour 0 et 1 si
+    # la séparation n'est pas forte).
+    w = 2 if type_B else 1
+    Z = 1 if zero_block else 0
+    b = np.arange(n + 2, dtype=object)
+    etats = [np.zeros(n + 2, dtype=object) for _ in range(3)]
+    if zero_block:
+        etats[2][1] = 1
+    elif n > 0:
+        etats[0][1] = 1
+    else:
+        etats[0][0] = 1
+    for _ in range(n - 1 + Z):
+        nouveaux = [np.zeros(n + 2, dtype=object) for _ in range(3)]
+        for t in range(3):
+            e = etats[t]
+            # Nouveau bloc.
+            nouveaux[0][1:] += e[:-1]
+            # Autres blocs non nuls que celui du dernier élément.
+            autres = np.maximum(b - Z - (1 if t == 0 else 0), 0)
+            nouveaux[0] += w * autres * e
+            # Bloc zéro, s'il n'est pas celui du dernier élément.
+            if Z and t == 0:
+                nouveaux[1] += e
+            # Bloc du dernier élément.
+            if not fort:
+                if t == 0 and type_B:
+                    nouveaux[0] += e
+                elif t == 2:
+                    nouveaux[1] += e
+        etats = [_reduit(e, modulo) for e in nouveaux]
+    return sum(etats)
+
+
+def _dp_merge_free(n, zero_block, type_B, modulo):
+    # État : b, le nombre p de blocs en attente (bloc i-1 dont le maximum est
+    # encore inférieur au minimum du bloc i) et zp = 1 si le bloc zéro en fait
+    # partie. Ouvrir un bloc met le précédent en attente ; y ajouter un élément
+    # l'en sort. À la fin, aucun bloc ne doit être en attente.
+    w = 2 if type_B else 1
+    Z = 1 if zero_block else 0
+    b = np.arange(n + 2, dtype=object)[:, None]
+    p = np.arange(n + 2, dtype=object)[None, :]
+    etats = [np.zeros((n + 2, n + 2), dtype=object) for _ in range(2)]
+    if zero_block or n > 0:
+        etats[0][1, 0] = 1
+    else:
+        etats[0][0, 0] = 1
+    for m in range(n - 1 + Z):
+        nouveaux = [np.zeros((n + 2, n + 2), dtype=object) for _ in range(2)]
+        for zp in range(2):
+            e = etats[zp]
+            # Nouveau bloc : le bloc le plus récent passe en attente.
+            if Z and zp == 0:
+                nouveaux[1][2, 1:] += e[1, :-1]
+            else:
+                nouveaux[zp][2, 1:] += e[1, :-1]
+            nouveaux[zp][3:, 1:] += e[2:-1, :-1]
+            # Blocs non nuls en attente, puis bloc zéro en attente.
+            nouveaux[zp][:, :-1] += (w * np.maximum(p - zp, 0) * e)[:, 1:]
+            if zp == 1:
+                nouveaux[0][:, :-1] += e[:, 1:]
+            # Blocs non nuls qui ne sont pas en attente, puis bloc zéro.
+            nouveaux[zp] += w * np.maximum(b - Z - (p - zp), 0) * e
+            if Z and zp == 0:
+                nouveaux[0][1:] += e[1:]
+        # Il faut au moins un élément restant par bloc en attente.
+        restant = n - 1 + Z - (m + 1)
+        for e in nouveaux:
+            e[:, restant + 1:] = 0
+        etats = [_reduit(e, modulo) for e in nouveaux]
+    return etats[0][:, 0]
+
+
+def _dp_inversion_free(n, zero_block, type_B, modulo):
+    # Un élément ajouté à un bloc qui n'est pas le plus récent dépasse le minimum
+    # des blocs suivants : il doit être barré (impossible dans le bloc zéro et en
+    # type A). État : b et t = 1 si le bloc le plus récent est le bloc zéro.
+    w = 2 if type_B else 1
+    Z = 1 if zero_block else 0
+    b = np.arange(n + 2, dtype=object)
+    etats = [np.zeros(n + 2, dtype=object) for _ in range(2)]
+    if zero_block:
+        etats[1][1] = 1
+    elif n > 0:
+        etats[0][1] = 1
+    else:
+        etats[0][0] = 1
+    for _ in range(n - 1 + Z):
+        nouveaux = [np.zeros(n + 2, dtype=object) for _ in range(2)]
+        for t in range(2):
+            e = etats[t]
+            nouveaux[0][1:] += e[:-1]
+            nouveaux[t] += (1 if t == 1 else w) * e
+            if type_B and t == 0:
+                nouveaux[0] += np.maximum(b - 1 - Z, 0) * e
+        etats = [_reduit(e, modulo) for e in nouveaux]
+    return sum(etats)
+
+
+# Classe : (comptage par blocs, prédicat correspondant).
+CLASSES_B = {
+    "separated": (lambda n, z, tb, mod: _dp_separated(n, z, tb, False, mod), is_separated),
+    "strongly_separated": (lambda n, z, tb, mod: _dp_separated(n, z, tb, True, mod), is_strongly_separated),
+    "merge_free": (_dp_merge_free, is_merge_free),
+    "inversion_free": (_dp_inversion_free, is_inversion_free),
+}
+
+
+def calcule_classe_B(n, classe, k=None, zero_block=True, type_B=True, modulo=None):
+    """
+    Nombre de partitions de type B (forme d'Adler) de [0, n] (ou de [1, n] si
+    zero_block est faux) de la classe donnée (clé de CLASSES_B), en k blocs si k
+    est donné, sans les énumérer (programmation dynamique en O(n^2), O(n^3)
+    pour merge_free). Avec type_B faux, compte les partitions de type A.
+    Comme pour partitionne_B_lazy, k compte le bloc zéro parmi les blocs.
+    """
+    par_blocs = CLASSES_B[classe][0](n, zero_block, type_B, modulo)
+    total = sum(par_blocs) if k is None else (par_blocs[k] if 0 <= k < len(par_blocs) else 0)
+    total = int(total)
+    return total if modulo is None else total % modulo
+
+
+def verifie_classes_B(n_max=6):
+    """
+    Compare calcule_classe_B au filtrage par les prédicats is_* des partitions
+    énumérées, pour n <= n_max. Renvoie la liste des écarts
+    (classe, n, k, zero_block, type_B, calculé, énuméré), vide si tout concorde.
+    """
+    ecarts = []
+    for classe, (_, predicat) in CLASSES_B.items():
+        for zero_block in (True, False):
+            for type_B in (True, False):
+                for n in range(n_max + 1):
+                    lst = list(range(0 if zero_block else 1, n + 1))
+                    for k in [None] + list(range(len(lst) + 1)):
+                        if type_B:
+                            parts = partitionne_B_lazy(lst, k)
+                        elif k is None:
+                            parts = partitionne_bell_lazy(lst)
+                        else:
+                            parts = partitionne_stirling_lazy(lst, k)
+                        enumere = sum(1 for part in parts if predicat(part))
+                        calcule = calcule_classe_B(n, classe, k, zero_block, type_B)
+                        if calcule != enumere:
+                            ecarts.append((classe, n, k, zero_block, type_B, calcule, enumere))
+    return ecarts
+
+
+# ========== Polynômes des inversions (q-analogues) ==========
+
+# Quand l'élément x rejoint le bloc i parmi b blocs (ordonnés par minimum),
+# les b-1-i blocs suivants ont tous un minimum inférieur à x : x positif crée
+# b-1-i inversions (au sens de compte_inversions), x barré n'en crée aucune.
+# D'où les q-analogues des récurrences de TRIANGLES, T(n, k) = T(n-1, k-1) + m_k(q) T(n-1, k) :
+# - stirling (type A sur [1, n]) : m_k = [k]_q = 1 + q + ... + q^(k-1) ;
+# - dowling_no_zero_block (type B sur [1, n]) : m_k = [k]_q + k ;
+# - dowling (type B sur [0, n], k blocs non nuls) : m_k = q^k + [k]_q + k
+#   (le bloc zéro est le premier et ses éléments ne sont pas signés).
+# En q = 1, on retrouve les multiplicateurs k, 2k et 2k+1. Les tables renvoyées
+# pour "dowling" sont ensuite décalées d'une ligne : comme dans partitionne_B_lazy
+# et calcule_classe_B, le nombre de blocs y compte le bloc zéro.
+
+NOYAUX_Q_INVERSIONS = {
+    "stirling": lambda k: [1] * k,
+    "dowling_no_zero_block": lambda k: [k + 1] + [1] * (k-1) if k > 0 else [],
+    "dowling": lambda k: ([k + 1] + [1] * (k-1) + [1]) if k > 0 else [1],
+}
+
+
+def table_q_inversions(n, famille="stirling", modulo=None):
+    """
+    Table jointe (blocs, inversions) de la famille (clé de NOYAUX_Q_INVERSIONS) :
+    T[k, d] est le nombre de partitions à k blocs (bloc zéro compris pour
+    "dowling", dont la table a donc n + 2 lignes) ayant d inversions, calculée
+    par convolutions NumPy sans énumération (modulo un entier si modulo est
+    donné).
+    """
+    noyau = NOYAUX_Q_INVERSIONS[famille]
+    nb_elements = n + 1 if famille == "dowling" else n
+    degre = nb_elements * (nb_elements - 1) // 2
+    # Entiers machine tant que les effectifs (ou les restes) le permettent.
+    if modulo is None:
+        petit = _somme_ligne(famille, n) < 2**62
+    else:
+        petit = modulo * (2*n + 4) < 2**62
+    dtype = np.int64 if petit else object
+
+    table = np.zeros((n + 1, degre + 1), dtype=dtype)
+    table[0, 0] = 1
+    for m in range(1, n + 1):
+        nouvelle = np.zeros_like(table)
+        # Nouveau bloc (aucune inversion créée).
+        nouvelle[1:m+1] = table[:m]
+        # Ajout à un bloc existant.
+        for k in range(1, m + 1) if famille != "dowling" else range(m):
+            if table[k].any():
+                nouvelle[k] += np.convolve(table[k], np.array(noyau(k), dtype=dtype))[:degre + 1]
+        table = nouvelle if modulo is None else nouvelle % modulo
+    if famille == "dowling":
+        table = np.concatenate((np.zeros_like(table[:1]), table))
+    return table
+
+
+def polynome_q_inversions(n, famille="stirling", k=None, modulo=None):
+    """
+    Coefficients du polynôme générateur des inversions sur la famille (sur les
+    partitions à k blocs si k est donné, bloc zéro compris pour "dowling",
+    comme dans table_q_inversions) : c[d] est le nombre de partitions
+    ayant d inversions. Le vecteur a toujours la longueur degré maximal + 1
+    (n(n-1)/2 + 1, ou n(n+1)/2 + 1 pour "dowling"), même si les derniers
+    coefficients sont nuls modulo.
+    """
+    table = table_q_inversions(n, famille, modulo)
+    poly = table.sum(axis=0) if k is None else table[k]
+    if modulo is not None:
+        poly = poly % modulo
+    return poly
+
+
 # ========== Type B non-nesting partitions =========
 
 def plot_partition(partition, figsize=(10, 2), arc_height_scale=1.0):
@@ -609,6 +3227,7 @@ def plot_partition(partition, figsize=(10, 2), arc_height_scale=1.0):
     pos = {x: i + 1 for i, x in enumerate(elements)}
     n = len(elements)
 
+    from matplotlib.patches import Arc
     fig, ax = plt.subplots(figsize=figsize)
 
     # 3) Trace les points et leurs labels
@@ -644,23 +3263,64 @@ def plot_partition(partition, figsize=(10, 2), arc_height_scale=1.0):
 
 # ========== Stirling Permutations ==========
 
-def get_tree_from_stir_perm(perm):
-
-    visited = []
-    graph = []
+def arbre_stirling(perm):
+    """
+    Arbre croissant associé à une permutation de Stirling, calculé en O(n)
+    avec une pile des éléments ouverts : la première occurrence de e en fait
+    un enfant du sommet de la pile, la seconde le dépile.
 
+    Returns:
+        (parents, ordre, profondeurs, nb_enfants) : parents[v], profondeurs[v]
+        et nb_enfants[v] sont indexés par les sommets 0..n (0 est la racine),
+        ordre liste les sommets non nuls en ordre préfixe.
+    """
+    n = max(perm, default=0)
+    parents = [0] * (n + 1)
+    profondeurs = [0] * (n + 1)
+    nb_enfants = [0] * (n + 1)
+    vus = [False] * (n + 1)
+    ordre = []
+    pile = [0]
     for e in perm:
-        if len(visited) == 0:
-            graph.append((0, e))
-            visited.append(e)
+        if vus[e]:
+            pile.pop()
         else:
-            if e not in visited:
-                graph.append((visited[-1], e))
-                visited.append(e)
-            else:
-                visited = visited[:-1]
+            vus[e] = True
+            p = pile[-1]
+            parents[e] = p
+            profondeurs[e] = len(pile)
+            nb_enfants[p] += 1
+            ordre.append(e)
+            pile.append(e)
+    return parents, ordre, profondeurs, nb_enfants
+
+
+def get_tree_from_stir_perm(perm):
+    """
+    Arêtes (parent, enfant) de l'arbre associé à perm, en ordre préfixe.
+    """
+    parents, ordre, _, _ = arbre_stirling(perm)
+    return [(parents[e], e) for e in ordre]
 
-    return graph
+
+def get_stir_perm_from_tree(tree):
+    """
+    Inverse de get_tree_from_stir_perm : permutation de Stirling dont l'arbre
+    est donné par ses arêtes (parent, enfant) en ordre préfixe, en O(n). Depuis
+    arbre_stirling, tree = [(parents[e], e) for e in ordre].
+    """
+    perm = []
+    pile = [0]
+    for parent, e in tree:
+        while pile[-1] != parent:
+            if len(pile) == 1:
+                raise ValueError(f"Arête ({parent}, {e}) hors de l'ordre préfixe.")
+            perm.append(pile.pop())
+        perm.append(e)
+        pile.append(e)
+    while len(pile) > 1:
+        perm.append(pile.pop())
+    return perm
 
 def count_leaves_on_stir_perm(perm):
     count = 0
@@ -686,6 +3346,312 @@ def generate_stirling_permutations_rec(n):
 
     return all_perm
 
+# ========== Permutations de Stirling par lots ==========
+
+# generate_stirling_permutations_rec construit les (2n-1)!! permutations en
+# listes. Ici, les permutations sont produites dans le même ordre par blocs :
+# un préfixe d'ordre n-r (énuméré paresseusement) est étendu par insertions
+# vectorisées des r dernières paires. Les statistiques se calculent ensuite
+# sur des tableaux (chunk, 2n) ; les descentes et ascensions s'obtiennent avec
+# compte_desc_batch et compte_asc_batch.
+
+def _stirling_listes_lazy(n):
+    """
+    Permutations de Stirling d'ordre n une à une, dans l'ordre de
+    generate_stirling_permutations_rec, par insertion et retrait sur place.
+    """
+    perm = []
+
+    def insere(i):
+        if i > n:
+            yield list(perm)
+            return
+        for p in range(2*i - 1):
+            perm[p:p] = [i, i]
+            yield from insere(i + 1)
+            del perm[p:p+2]
+
+    yield from insere(1)
+
+
+def _insere_paire_batch(perms, i):
+    """
+    Insère la paire i i dans chacun des 2i-1 emplacements de chaque ligne de
+    perms (N, 2i-2) : renvoie le tableau (N (2i-1), 2i) des résultats, ligne
+    par ligne puis emplacement par emplacement.
+    """
+    N, m = perms.shape
+    res = np.empty((N * (m + 1), m + 2), dtype=perms.dtype)
+    for p in range(m + 1):
+        bloc = res[p::m+1]
+        bloc[:, :p] = perms[:, :p]
+        bloc[:, p:p+2] = i
+        bloc[:, p+2:] = perms[:, p:]
+    return res
+
+
+def _blocs_stirling(n, taille_bloc):
+    """
+    Tableaux successifs d'au plus max(taille_bloc, 1) permutations de Stirling
+    d'ordre n, dans l'ordre de generate_stirling_permutations_rec.
+    """
+    dtype = np.int16 if n <= np.iinfo(np.int16).max else np.int32
+    # r dernières paires insérées de façon vectorisée
+    r, produit = 0, 1
+    while r < n - 1 and produit * (2*(n - r) - 1) <= taille_bloc:
+        produit *= 2*(n - r) - 1
+        r += 1
+    for prefixe in _stirling_listes_lazy(n - r):
+        bloc = np.array([prefixe], dtype=dtype)
+        for i in range(n - r + 1, n + 1):
+            bloc = _insere_paire_batch(bloc, i)
+        yield bloc
+
+
+def generate_stirling_permutations_lazy(n, chunk_size=None):
+    """
+    Version paresseuse de generate_stirling_permutations_rec : produit les
+    permutations de Stirling d'ordre n une à une (listes), dans le même ordre,
+    avec une mémoire en O(n). Avec chunk_size, produit des tableaux NumPy
+    (chunk, 2n) d'au plus chunk_size permutations.
+    """
+    if chunk_size is None:
+        yield from _stirling_listes_lazy(n)
+        return
+    reste = None
+    for bloc in _blocs_stirling(n, chunk_size):
+        if reste is not None:
+            bloc = np.concatenate([reste, bloc])
+        fin = len(bloc) - len(bloc) % chunk_size
+        for debut in range(0, fin, chunk_size):
+            yield bloc[debut:debut+chunk_size]
+        reste = bloc[fin:] if fin < len(bloc) else None
+    if reste is not None:
+        yield reste
+
+
+def compte_plateaux_batch(perms):
+    """
+    Nombre de plateaux (perm[i] == perm[i+1]) de chaque permutation du lot,
+    c'est-à-dire le nombre de feuilles de l'arbre associé
+    (count_leaves_on_stir_perm).
+    """
+    perms = np.asarray(perms)
+    return (perms[:, :-1] == perms[:, 1:]).sum(axis=1)
+
+
+def parents_stirling_batch(perms):
+    """
+    Parents dans l'arbre de get_tree_from_stir_perm pour un lot (N, 2n) de
+    permutations de Stirling : tableau (N, n+1) dont la case [l, v] est le
+    parent de v (0 pour la racine, et la colonne 0 vaut 0). La pile des
+    éléments ouverts est simulée colonne par colonne, en parallèle sur les
+    lignes.
+    """
+    perms = np.asarray(perms)
+    N, taille = perms.shape
+    n = taille // 2
+    lignes = np.arange(N)
+    dtype = np.int16 if n <= np.iinfo(np.int16).max else np.int32
+    parents = np.zeros((N, n + 1), dtype=dtype)
+    # pile[l, 0] = 0 sert de sommet quand la pile est vide
+    pile = np.zeros((N, n + 1), dtype=dtype)
+    hauteur = np.zeros(N, dtype=np.intp)
+    vus = np.zeros((N, n + 1), dtype=bool)
+    for c in range(taille):
+        e = perms[:, c]
+        ouvre = ~vus[lignes, e]
+        l, v = lignes[ouvre], e[ouvre]
+        parents[l, v] = pile[l, hauteur[ouvre]]
+        vus[l, v] = True
+        hauteur += ouvre
+        pile[l, hauteur[ouvre]] = v
+        hauteur -= ~ouvre
+    return parents
+
+
+def arbres_stirling_batch(perms):
+    """
+    Version par lots de arbre_stirling pour un tableau (N, 2n) de permutations
+    de Stirling : renvoie les tableaux (parents, ordre, profondeurs,
+    nb_enfants), de formes (N, n+1), (N, n), (N, n+1) et (N, n+1).
+
+    La profondeur de v est le nombre de paires ouvertes à sa première
+    occurrence (somme cumulée de +1 aux premières occurrences, -1 aux
+    secondes).
+    """
+    perms = np.asarray(perms)
+    N, taille = perms.shape
+    n = taille // 2
+    parents = parents_stirling_batch(perms)
+    # Positions des deux occurrences de chaque valeur, la première d'abord
+    positions = np.argsort(perms, axis=1, kind="stable")
+    premieres = positions[:, 0::2]
+    ordre = (np.argsort(premieres, axis=1) + 1).astype(parents.dtype)
+    pas = np.full((N, taille), -1, dtype=parents.dtype)
+    np.put_along_axis(pas, premieres, 1, axis=1)
+    profondeurs = np.zeros((N, n + 1), dtype=parents.dtype)
+    profondeurs[:, 1:] = np.take_along_axis(np.cumsum(pas, axis=1, dtype=parents.dtype), premieres, axis=1)
+    decalages = (n + 1) * np.arange(N)[:, None]
+    nb_enfants = np.bincount((parents[:, 1:] + decalages).ravel(), minlength=N * (n + 1))
+    nb_enfants = nb_enfants.reshape(N, n + 1).astype(parents.dtype)
+    return parents, ordre, profondeurs, nb_enfants
+
+
+STATS_STIRLING = {
+    "des": (compte_desc_batch, lambda n: max(2*n - 1, 0)),
+    "asc": (compte_asc_batch, lambda n: max(2*n - 1, 0)),
+    "plat": (compte_plateaux_batch, lambda n: n),
+}
+
+
+def distribution_stirling(n, stats=("des", "plat"), chunk_size=1 << 16):
+    """
+    Histogramme joint des statistiques stats (clés de STATS_STIRLING) sur les
+    permutations de Stirling d'ordre n, énumérées par lots de chunk_size.
+
+    Returns:
+        Tableau d'effectifs h tel que h[a, b, ...] est le nombre de
+        permutations dont les statistiques valent a, b, ...
+    """
+    forme = tuple(STATS_STIRLING[s][1](n) + 1 for s in stats)
+    hist = np.zeros(int(np.prod(forme)), dtype=np.int64)
+    for morceau in generate_stirling_permutations_lazy(n, chunk_size):
+        valeurs = [STATS_STIRLING[s][0](morceau) for s in stats]
+        hist += np.bincount(np.ravel_multi_index(valeurs, forme), minlength=len(hist))
+    return hist.reshape(forme)
+
+
+# ========== Échantillonnage uniforme ==========
+
+# Partitions : algorithme de Stam, d'après les formules de Dobinski
+# (voir _somme_dobinski). On tire M = m avec probabilité proportionnelle à
+# (a m + b)^n c^m / m!, puis on jette chaque élément non nul dans une urne
+# uniforme parmi a m + b :
+# - type A (a=1, b=0, c=1) : les urnes non vides forment les blocs ;
+# - type B (a=2, c=1/2) : m paires d'urnes (+i, -i), plus l'urne du bloc zéro
+#   si b = 1 ; une paire non vide donne un bloc et son opposé, l'urne donnant
+#   le signe. Chaque partition (forme complète) est obtenue avec la même
+#   probabilité ; on garde ensuite le représentant d'Adler de chaque bloc.
+
+def _loi_stam(n, a, b, c):
+    """
+    Probabilités (tronquées aux termes non négligeables) de M dans l'algorithme de Stam.
+    """
+    m = np.arange(4 * n + 64)
+    log_fact = np.concatenate(([0.0], np.cumsum(np.log(m[1:]))))
+    log_poids = m * np.log(c) - log_fact
+    if n > 0:
+        with np.errstate(divide="ignore"):
+            log_poids += n * np.log(a * m + b)
+    log_poids -= log_poids.max()
+    poids = np.exp(log_poids)
+    return poids / poids.sum()
+
+
+def _relabel_rgs(urnes, nb_urnes, dtype):
+    """
+    Transforme des numéros d'urnes, rangés par élément (n, N), en RGS (blocs
+    numérotés par ordre d'apparition), rangés de même ; renvoie aussi la
+    position du premier élément de chaque urne (N, nb_urnes).
+    """
+    n, N = urnes.shape
+    lignes = np.arange(N)
+    premiers = np.full((N, nb_urnes), n, dtype=np.int64)
+    for j in reversed(range(n)):
+        premiers[lignes, urnes[j]] = j
+    ordre = np.argsort(premiers, axis=1, kind="stable")
+    rang = np.empty((N, nb_urnes), dtype=dtype)
+    np.put_along_axis(rang, ordre, np.broadcast_to(np.arange(nb_urnes, dtype=dtype), (N, nb_urnes)), axis=1)
+    return rang[lignes, urnes], premiers
+
+
+def echantillonne_partitions(lst, nb, type_B=False, seed=None):
+    """
+    Tire nb partitions uniformes de lst, de type A, ou de type B (forme
+    d'Adler) si type_B est vrai (avec un bloc zéro si lst contient 0).
+    seed est une graine ou un np.random.Generator.
+
+    Returns:
+        Un PartitionBatch, utilisable directement avec les prédicats is_*.
+    """
+    rng = np.random.default_rng(seed)
+    elements = sorted(lst, key=abs)
+    zero_block = type_B and len(elements) > 0 and elements[0] == 0
+    n = len(elements) - zero_block
+    a, b, c = (2, 1 if zero_block else 0, 0.5) if type_B else (1, 0, 1)
+    loi = _loi_stam(n, a, b, c)
+    dtype = _dtype_labels(len(elements))
+    lignes = np.arange(nb)
+    # Les tirages sont rangés par élément (n, N) pour des accès contigus.
+    M = rng.choice(len(loi), size=nb, p=loi)
+    rgs = np.zeros((len(elements), nb), dtype=dtype)
+    signes = np.zeros((len(elements), nb), dtype=bool) if type_B else None
+    pas = max(1, (1 << 24) // max(len(elements), 1))
+    for debut in range(0, nb, pas):
+        fin = min(nb, debut + pas)
+        urnes = rng.integers(0, a * M[debut:fin] + b, size=(n, fin - debut), dtype=np.int32)
+        nb_urnes = a * int(M[debut:fin].max()) + b + 1
+        if not type_B:
+            rgs[:, debut:fin], _ = _relabel_rgs(urnes, nb_urnes, dtype)
+            continue
+        # Urne u -> paire (u + b) // 2 (la paire 0 est le bloc zéro), signe selon la parité.
+        paires = (urnes + b) // 2
+        barres = (urnes + b) % 2 == 1
+        if zero_block:
+            barres &= paires > 0
+            paires = np.vstack((np.zeros((1, fin - debut), dtype=np.int32), paires))
+            barres = np.vstack((np.zeros((1, fin - debut), dtype=bool), barres))
+        rgs[:, debut:fin], premiers = _relabel_rgs(paires, nb_urnes, dtype)
+        # Représentant d'Adler : le premier élément de chaque bloc est positif.
+        premier_bloc = premiers[lignes[:fin - debut], paires]
+        signes[:, debut:fin] = barres ^ barres[premier_bloc, lignes[:fin - debut]]
+    return PartitionBatch(rgs.T, elements, None if signes is None else signes.T)
+
+
+def echantillonne_stirling_permutations(n, nb, seed=None):
+    """
+    Tire nb permutations de Stirling d'ordre n uniformes, sous forme d'un
+    tableau (nb, 2n) (chaque ligne est une permutation de
+    generate_stirling_permutations_rec(n)).
+
+    Insérer la paire i i dans l'un des 2i-1 emplacements revient à la placer
+    juste après le début ou après l'une des 2i-2 occurrences déjà présentes.
+    On tire donc ce « parent » uniformément ; la permutation est le parcours
+    préfixe de l'arbre obtenu (occurrences 2i-1 et 2i de la paire i, la
+    seconde étant le dernier enfant de la première, enfants rangés par paire
+    décroissante), calculé en O(n) par ligne et vectorisé sur les lignes.
+    """
+    rng = np.random.default_rng(seed)
+    taille = 2 * n
+    dtype = np.int16 if n <= np.iinfo(np.int16).max else np.int32
+    perms = np.zeros((nb, taille), dtype=dtype)
+    # Les tableaux de travail sont rangés par nœud (2n+1, N) pour des accès contigus.
+    pas = max(1, (1 << 22) // (taille + 1))
+    for debut in range(0, nb, pas):
+        N = min(pas, nb - debut)
+        lignes = np.arange(N)
+        parents = np.zeros((taille + 1, N), dtype=np.int32)
+        for i in range(1, n + 1):
+            parents[2*i - 1] = rng.integers(0, 2*i - 1, size=N, dtype=np.int32)
+            parents[2*i] = 2*i - 1
+        # Passe descendante : taille des sous-arbres déjà vus de chaque nœud et
+        # décalage de chaque nœud après ses frères de paire plus grande.
+        cumul = np.zeros((taille + 1, N), dtype=np.int32)
+        decalages = np.zeros((taille + 1, N), dtype=np.int32)
+        for c in range(taille, 0, -1):
+            p = parents[c]
+            decalages[c] = cumul[p, lignes]
+            cumul[p, lignes] += cumul[c] + 1
+        # Passe montante : position de chaque occurrence dans le parcours préfixe.
+        positions = cumul
+        positions[0] = 0
+        morceau = np.zeros((taille, N), dtype=dtype)
+        for c in range(1, taille + 1):
+            positions[c] = positions[parents[c], lignes] + 1 + decalages[c]
+            morceau[positions[c] - 1, lignes] = (c + 1) // 2
+        perms[debut:debut+N] = morceau.T
+    return perms
 
 # ========== Flattened Stirling Permutations ==========
 
@@ -703,6 +3669,84 @@ def is_run_sorted(perm):
     return True
 
 
+# Une permutation est run-sorted si ses runs (suites croissantes maximales)
+# commencent par des valeurs croissantes. Ses runs sont alors les blocs,
+# écrits en ordre croissant, d'une partition de type A merge-free (le maximum
+# de chaque bloc dépasse le minimum du suivant), et réciproquement : il y en a
+# B(n-1) au lieu de n! candidates.
+
+def run_sorted_permutations_lazy(lst, k=None, chunk_size=None):
+    """
+    Produit les permutations run-sorted de lst (à k runs si k est donné) sans
+    filtrer les n! permutations, à partir des partitions merge-free de type A
+    de partitionne_elague_lazy, dans l'ordre lexicographique de leurs RGS.
+    Produit des listes une à une ou, avec chunk_size, des tableaux NumPy
+    (chunk, n) d'au plus chunk_size permutations.
+    """
+    elements = sorted(lst)
+    if chunk_size is None:
+        for part in partitionne_elague_lazy(elements, ("merge_free",), k, type_B=False):
+            yield [x for bloc in part for x in bloc]
+        return
+    valeurs = np.asarray(elements) if elements else np.zeros(0, dtype=np.int64)
+    lots = _par_lots((list(rgs) for rgs, _ in _rgs_elagues(elements, ("merge_free",), k, False)), chunk_size)
+    for lot in lots:
+        # Les éléments sont rangés par bloc, chaque bloc en ordre croissant.
+        yield valeurs[np.argsort(np.array(lot, dtype=np.int64).reshape(len(lot), -1), axis=1, kind="stable")]
+
+
+def is_run_sorted_batch(perms):
+    """
+    Version vectorisée de is_run_sorted pour un tableau (N, n) : chaque début
+    de run (après une descente) doit être au moins égal aux débuts précédents.
+    """
+    perms = np.asarray(perms)
+    if perms.shape[1] < 2:
+        return np.ones(len(perms), dtype=bool)
+    debuts = np.ones(perms.shape, dtype=bool)
+    debuts[:, 1:] = perms[:, :-1] > perms[:, 1:]
+    plancher = np.iinfo(perms.dtype).min if perms.dtype.kind in "iu" else -np.inf
+    maximum = np.maximum.accumulate(np.where(debuts, perms, plancher), axis=1)
+    return ~(debuts[:, 1:] & (perms[:, 1:] < maximum[:, :-1])).any(axis=1)
+
+
+def compte_run_sorted(n, k=None, modulo=None):
+    """
+    Nombre de permutations run-sorted de [n] (à k runs si k est donné), égal
+    au nombre de partitions merge-free de type A de [n] (en k blocs), calculé
+    par calcule_classe_B sans énumération.
+    """
+    return calcule_classe_B(n, "merge_free", k, zero_block=False, type_B=False, modulo=modulo)
+
+
+def verifie_run_sorted(n_max=7):
+    """
+    Compare, pour n <= n_max, le générateur direct (listes et tableaux) et
+    compte_run_sorted au filtrage de permute_rec par is_run_sorted, et
+    is_run_sorted_batch à is_run_sorted. Renvoie la liste des écarts
+    (n, k, test), k valant None hors des comptes par nombre de runs, vide si
+    tout concorde.
+    """
+    ecarts = []
+    for n in range(1, n_max + 1):
+        lst = list(range(1, n + 1))
+        perms = permute_rec(lst)
+        filtre = [is_run_sorted(p) for p in perms]
+        if is_run_sorted_batch(np.array(perms)).tolist() != filtre:
+            ecarts.append((n, None, "is_run_sorted_batch"))
+        attendues = sorted(p for p, ok in zip(perms, filtre) if ok)
+        directes = list(run_sorted_permutations_lazy(lst))
+        if sorted(directes) != attendues:
+            ecarts.append((n, None, "générateur"))
+        if np.concatenate(list(run_sorted_permutations_lazy(lst, chunk_size=3))).tolist() != directes:
+            ecarts.append((n, None, "générateur par lots"))
+        for k in range(n + 1):
+            nb = sum(1 for p in attendues if len(liste_desc(p)) + 1 == k)
+            if not compte_run_sorted(n, k) == nb == sum(1 for _ in run_sorted_permutations_lazy(lst, k)):
+                ecarts.append((n, k, "compte_run_sorted"))
+    return ecarts
+
+
 def get_flattened_stirling_permutations(part_B):
     """
     On traduit une partition de type B en une permutation de Stirling.
@@ -772,6 +3816,249 @@ def get_flattened_stirling_permutations(part_B):
     return perm
 
 
+def get_flattened_stirling_bijection(part_B):
+    """
+    On traduit une partition de type B merge-free sans bloc zéro (blocs
+    ordonnés par minimum, éléments par valeur absolue croissante) en une
+    permutation de Stirling run-sorted, en O(n) et sans modifier part_B ;
+    lève ValueError hors de ce domaine. Pour le bloc i de minimum m_i,
+    avec m = m_{i+1} le minimum du bloc suivant :
+    - les barrés a avec |a| < m (tous les barrés du dernier bloc) sont placés,
+      doublés, entre les deux occurrences de m_1, bloc après bloc ;
+    - le bloc donne ensuite m_i (sauf le premier, déjà placé), les positifs
+      < m doublés, les barrés > m doublés, m, puis les positifs > m doublés.
+
+    Coïncide avec get_flattened_stirling_permutations lorsque celle-ci renvoie
+    une permutation de Stirling (elle insère m_2 après les barrés déplacés
+    entre les 1, d'où des sorties invalides hors de ce cas).
+    """
+    k = len(part_B)
+    if k == 0:
+        return []
+    for i, bloc in enumerate(part_B):
+        if 0 in bloc:
+            raise ValueError("La partition a un bloc zéro.")
+        if i > 0 and max(abs(x) for x in part_B[i-1]) < bloc[0]:
+            raise ValueError("La partition n'est pas merge-free (blocs %d et %d)." % (i - 1, i))
+    minima = [bloc[0] for bloc in part_B] + [math.inf]
+
+    perm = [minima[0]]
+    for i, bloc in enumerate(part_B):
+        for x in bloc:
+            if x < 0 and -x < minima[i+1]:
+                perm += [-x, -x]
+    perm.append(minima[0])
+
+    for i, bloc in enumerate(part_B):
+        m = minima[i+1]
+        if i > 0:
+            perm.append(bloc[0])
+        inf, sup_neg, sup_pos = [], [], []
+        for x in bloc[1:]:
+            if x > 0:
+                (inf if x < m else sup_pos).extend((x, x))
+            elif -x > m:
+                sup_neg.extend((-x, -x))
+        perm += inf + sup_neg
+        if i < k - 1:
+            perm.append(m)
+        perm += sup_pos
+    return perm
+
+
+def get_part_B_from_flattened_stirling_permutation(perm):
+    """
+    Inverse de get_flattened_stirling_bijection, en O(n).
+
+    Après les deux occurrences de m_1, la première occurrence d'un minimum de
+    bloc suit une valeur plus grande ou n'est pas suivie de la seconde (la
+    partition est merge-free) ; celle d'un autre élément suit une valeur plus
+    petite et est doublée. Les valeurs placées entre les deux m_1 sont des
+    barrés, rangés dans le bloc que désigne leur valeur.
+    """
+    if len(perm) == 0:
+        return []
+    fin_zone = perm.index(perm[0], 1)
+    zone = set(perm[1:fin_zone])
+
+    minima = [perm[0]]
+    vus = set()
+    for j in range(fin_zone + 1, len(perm)):
+        v = perm[j]
+        if v not in vus:
+            vus.add(v)
+            if perm[j-1] > v or perm[j+1] != v:
+                minima.append(v)
+    est_min = set(minima)
+
+    # Bloc de chaque valeur hors de la zone ; avant le minimum du bloc
+    # suivant, les valeurs plus grandes que lui sont barrées.
+    bloc_de = {perm[0]: 0}
+    barres = set()
+    b, milieu = 0, False
+    vus = set()
+    for j in range(fin_zone + 1, len(perm)):
+        v = perm[j]
+        if v in vus:
+            if v in est_min:
+                b += 1
+                milieu = False
+            continue
+        vus.add(v)
+        if v in est_min:
+            bloc_de[v] = b + 1
+            milieu = True
+        else:
+            bloc_de[v] = b
+            if not milieu and b + 1 < len(minima) and v > minima[b+1]:
+                barres.add(v)
+
+    blocs = [[] for _ in minima]
+    courant = -1
+    for x in range(1, max(perm) + 1):
+        if x in est_min:
+            courant += 1
+        if x in zone:
+            blocs[courant].append(-x)
+        elif x in bloc_de:
+            blocs[bloc_de[x]].append(-x if x in barres else x)
+    return blocs
+
+
+def _flattened_stirling_batch(batch):
+    n = batch.n
+    if n == 0:
+        return np.zeros((len(batch), 0), dtype=batch.elements.dtype)
+    rgs = batch.rgs.astype(np.int64)
+    barres = batch.signes
+    N = len(rgs)
+    j = np.broadcast_to(np.arange(n), (N, n))
+    # Indice du minimum de chaque bloc, puis de celui du bloc suivant (n si aucun)
+    est_min = np.ones((N, n), dtype=bool)
+    est_min[:, 1:] = rgs[:, 1:] > np.maximum.accumulate(rgs, axis=1)[:, :-1]
+    premier = np.full((N, n + 1), n, dtype=np.int64)
+    np.put_along_axis(premier, np.where(est_min, rgs, n), j, axis=1)
+    premier[:, n] = n
+    petit = j < np.take_along_axis(premier, rgs + 1, axis=1)
+
+    # Clé (bloc de sortie, section, bloc d'origine, élément) de chaque occurrence.
+    # Sections : 0 m_1, 1 zone, 2 ouverture m_i, 3 positifs < m, 4 barrés > m,
+    # 5 minimum suivant, 6 positifs > m.
+    def cle(bloc, section, origine, element):
+        return ((bloc * 7 + section) * n + origine) * n + element
+
+    cle_a = np.where(petit,
+                     np.where(barres, cle(0, 1, rgs, j), cle(rgs, 3, 0, j)),
+                     np.where(barres, cle(rgs, 4, 0, j), cle(rgs, 6, 0, j)))
+    cle_b = np.where(est_min, cle(rgs, 2, 0, 0), cle_a)
+    cle_a = np.where(est_min, np.where(rgs == 0, 0, cle(rgs - 1, 5, 0, 0)), cle_a)
+    ordre = np.argsort(np.concatenate([cle_a, cle_b], axis=1), axis=1, kind="stable")
+    return batch.elements[ordre % n]
+
+
+def get_flattened_stirling_bijection_batch(parts):
+    """
+    Version par lots de get_flattened_stirling_bijection : parts est un
+    PartitionBatch (ou une liste de partitions) de partitions merge-free sans
+    bloc zéro. Renvoie un tableau (N, 2n) ; chaque occurrence reçoit une clé
+    (bloc, section, bloc d'origine, élément) et chaque ligne est triée selon
+    ces clés.
+    """
+    if not isinstance(parts, PartitionBatch):
+        parts = PartitionBatch.from_parts(parts)
+    return _par_morceaux(parts, _flattened_stirling_batch)
+
+
+def _parts_B_depuis_flattened(perms):
+    N, taille = perms.shape
+    n = taille // 2
+    lignes = np.arange(N)[:, None]
+    valeurs = np.arange(1, n + 1)
+    # Positions des deux occurrences de chaque valeur 1..n
+    positions = np.argsort(perms, axis=1, kind="stable")
+    p1, p2 = positions[:, 0::2], positions[:, 1::2]
+
+    zone = p1 < p2[:, :1]
+    zone[:, 0] = False
+    avant = perms[lignes, np.maximum(p1 - 1, 0)]
+    apres = perms[lignes, p1 + 1]
+    est_min = ~zone & ((avant > valeurs) | (apres != valeurs))
+    est_min[:, 0] = True
+
+    # Blocs : les secondes occurrences des minima ouvrent les blocs
+    ouvertures = np.zeros((N, taille), dtype=np.int64)
+    np.put_along_axis(ouvertures, p2, est_min, axis=1)
+    ouvertures = np.cumsum(ouvertures, axis=1)
+    rang = np.cumsum(est_min, axis=1) - 1
+    rgs = np.take_along_axis(ouvertures, np.where(est_min, p2, p1), axis=1) - 1
+    rgs = np.where(zone, rang, rgs)
+
+    # Minimum du bloc suivant et position de sa première occurrence
+    minima = np.full((N, n + 1), n + 1, dtype=np.int64)
+    np.put_along_axis(minima, np.where(est_min, rang, n), valeurs, axis=1)
+    minima[:, n] = n + 1
+    suivant = np.take_along_axis(minima, np.minimum(rgs + 1, n), axis=1)
+    p1_etendu = np.concatenate([p1, np.full((N, 1), taille)], axis=1)
+    p1_suivant = np.take_along_axis(p1_etendu, suivant - 1, axis=1)
+    signes = zone | (~est_min & (valeurs > suivant) & (p1 < p1_suivant))
+    return rgs, signes
+
+
+def get_parts_B_from_flattened_stirling_batch(perms):
+    """
+    Version par lots de get_part_B_from_flattened_stirling_permutation, pour
+    un tableau (N, 2n) de permutations aplaties de 1..n : renvoie un
+    PartitionBatch.
+    """
+    perms = np.asarray(perms)
+    N, taille = perms.shape
+    n = taille // 2
+    if n == 0:
+        return PartitionBatch(np.zeros((N, 0)), [])
+    morceaux = [_parts_B_depuis_flattened(perms[i:i+_TAILLE_MORCEAU]) for i in range(0, N, _TAILLE_MORCEAU)]
+    if not morceaux:
+        return PartitionBatch(np.zeros((0, n)), np.arange(1, n + 1))
+    rgs = np.concatenate([r for r, _ in morceaux])
+    signes = np.concatenate([s for _, s in morceaux])
+    return PartitionBatch(rgs, np.arange(1, n + 1), signes)
+
+
+def verifie_flattened_stirling_bijection(n_max=7):
+    """
+    Vérifie, pour n de 1 à n_max, que get_flattened_stirling_bijection est
+    une bijection des partitions merge-free de type B de [n] (sans bloc zéro)
+    sur les permutations de Stirling run-sorted, que les inverses et les
+    versions par lots concordent, et que get_flattened_stirling_permutations
+    donne le même résultat dès qu'elle renvoie une permutation de Stirling. Renvoie la liste
+    des écarts (n, test, partition ou None), vide si tout concorde.
+    """
+    ecarts = []
+    for n in range(1, n_max + 1):
+        batch = partitionne_elague_batch(list(range(1, n + 1)), ("merge_free",))
+        parts = batch.to_parts()
+        perms = get_flattened_stirling_bijection_batch(batch)
+        stirling = {tuple(p) for p in generate_stirling_permutations_rec(n)}
+        aplaties = {p for p in stirling if is_run_sorted(list(p))}
+        if {tuple(p) for p in perms.tolist()} != aplaties or len(aplaties) != len(parts):
+            ecarts.append((n, "image", None))
+
+        retour = get_parts_B_from_flattened_stirling_batch(perms)
+        if not (np.array_equal(retour.rgs, batch.rgs) and np.array_equal(retour.signes, batch.signes)):
+            ecarts.append((n, "inverse par lots", None))
+        for part, perm in zip(parts, perms.tolist()):
+            copie = [bloc[:] for bloc in part]
+            if get_flattened_stirling_bijection(part) != perm:
+                ecarts.append((n, "directe", copie))
+            if part != copie:
+                ecarts.append((n, "argument modifié", copie))
+            if get_part_B_from_flattened_stirling_permutation(perm) != copie:
+                ecarts.append((n, "inverse", copie))
+            ancienne = get_flattened_stirling_permutations([bloc[:] for bloc in copie])
+            if tuple(ancienne) in stirling and ancienne != perm:
+                ecarts.append((n, "get_flattened_stirling_permutations", copie))
+    return ecarts
+
+
 def is_flattened_stirling_tree_old(tree):
     """
     Vérifie si un arbre respectes la définition de flattened.
@@ -836,4 +4123,125 @@ def is_flattened_stirling_tree_old(tree):
                 else:
                     return False
 
-    return True
\ No newline at end of file
+    return True
+
+def is_flattened_stirling_tree(tree):
+    """
+    Même test que is_flattened_stirling_tree_old sur les arbres (enfants
+    distincts), en temps linéaire et sans NumPy ni pandas : un premier passage
+    relève les sommets qui sont parents, un second vérifie toutes les
+    conditions arête par arête. Un sommet qui apparaît deux fois comme enfant
+    rend l'arbre invalide.
+    """
+    parents = {p for p, _ in tree}
+    enfants = set()
+    dernier_enfant = {}
+    dernier_noeud = None
+    last_descent = 0
+    for i, (p, c) in enumerate(tree):
+        # Enfants distincts, feuilles croissantes, hauteur au plus 2
+        if c <= p or c in enfants:
+            return False
+        enfants.add(c)
+        if p != 0:
+            if c in parents:
+                return False
+            # Enfants d'un même noeud croissants, noeuds croissants
+            if p in dernier_enfant:
+                if dernier_enfant[p] > c:
+                    return False
+            else:
+                if dernier_noeud is not None and dernier_noeud > p:
+                    return False
+                dernier_noeud = p
+            dernier_enfant[p] = c
+        elif i == 0:
+            last_descent = c
+        else:
+            # Feuille basse : voir is_flattened_stirling_tree_old
+            p_prec, c_prec = tree[i-1]
+            if p_prec != 0:
+                if c < p_prec:
+                    return False
+                last_descent = p_prec
+            elif c < c_prec:
+                if c > last_descent:
+                    last_descent = c
+                else:
+                    return False
+    return True
+
+
+def is_flattened_stirling_tree_batch(parents, ordre):
+    """
+    Version par lots de is_flattened_stirling_tree, sur les tableaux parents
+    (N, n+1) et ordre (N, n) de arbres_stirling_batch : renvoie un masque
+    booléen (N,). Seule la condition sur la dernière descente, séquentielle,
+    est calculée colonne par colonne.
+    """
+    parents = np.asarray(parents)
+    C = np.asarray(ordre)
+    N, n = C.shape
+    if n == 0:
+        return np.ones(N, dtype=bool)
+    # Arêtes (P[:, i], C[:, i]) en ordre préfixe
+    P = np.take_along_axis(parents, C, axis=1)
+    ok = ~(C <= P).any(axis=1)
+
+    est_parent = np.zeros((N, parents.shape[1]), dtype=bool)
+    np.put_along_axis(est_parent, P, True, axis=1)
+    ok &= ~((P != 0) & np.take_along_axis(est_parent, C, axis=1)).any(axis=1)
+
+    # Arêtes regroupées par parent, dans l'ordre d'apparition
+    tri = np.argsort(P, axis=1, kind="stable")
+    P_tri = np.take_along_axis(P, tri, axis=1)
+    C_tri = np.take_along_axis(C, tri, axis=1)
+    meme = (P_tri[:, 1:] == P_tri[:, :-1]) & (P_tri[:, 1:] != 0)
+    ok &= ~(meme & (C_tri[:, :-1] > C_tri[:, 1:])).any(axis=1)
+
+    # Noeuds dans l'ordre de leur première apparition
+    premiers = np.ones((N, n), dtype=bool)
+    premiers[:, 1:] = ~meme
+    premiers &= P_tri != 0
+    noeuds = np.zeros_like(P)
+    np.put_along_axis(noeuds, tri, np.where(premiers, P_tri, 0), axis=1)
+    maximum = np.maximum.accumulate(noeuds, axis=1)
+    ok &= ~((noeuds[:, 1:] != 0) & (noeuds[:, 1:] < maximum[:, :-1])).any(axis=1)
+
+    last_descent = np.where(P[:, 0] == 0, C[:, 0], 0)
+    for i in range(1, n):
+        bas = P[:, i] == 0
+        apres_noeud = bas & (P[:, i-1] != 0)
+        ok &= ~(apres_noeud & (C[:, i] < P[:, i-1]))
+        last_descent = np.where(apres_noeud, P[:, i-1], last_descent)
+        descente = bas & (P[:, i-1] == 0) & (C[:, i] < C[:, i-1])
+        ok &= ~(descente & (C[:, i] <= last_descent))
+        last_descent = np.where(descente, C[:, i], last_descent)
+    return ok
+
+
+def verifie_flattened_stirling_trees(n_max=7):
+    """
+    Compare is_flattened_stirling_tree et is_flattened_stirling_tree_batch à
+    is_flattened_stirling_tree_old sur les arbres de toutes les permutations
+    de Stirling d'ordre 1 à n_max. Renvoie la liste des écarts
+    (permutation, ancien, nouveau, par lots), vide si tout concorde.
+    """
+    ecarts = []
+    for n in range(1, n_max + 1):
+        perms = np.array(generate_stirling_permutations_rec(n))
+        parents, ordre, _, _ = arbres_stirling_batch(perms)
+        masque = is_flattened_stirling_tree_batch(parents, ordre)
+        for perm, par_lots in zip(perms.tolist(), masque.tolist()):
+            tree = get_tree_from_stir_perm(perm)
+            ancien = bool(is_flattened_stirling_tree_old(tree))
+            nouveau = is_flattened_stirling_tree(tree)
+            if not ancien == nouveau == par_lots:
+                ecarts.append((perm, ancien, nouveau, par_lots))
+    return ecarts
+
+
+# Noms exportés par « from packcombi import * » : tout le module public, sauf
+# les mandataires np, pd et plt, qui masqueraient les vrais modules importés
+# par le code appelant.
+__all__ = [nom for nom in globals() if not nom.startswith("_") and nom not in ("np", "pd", "plt")]